@@ -0,0 +1,131 @@
+"""Hot/archive split for answered suggestions.
+
+``archive_answered`` moves answered suggestions older than
+ARCHIVE_AFTER_DAYS from ``suggestions`` into ``suggestions_archive`` in
+batches: each batch is one short transaction (lock the ids, INSERT ...
+SELECT, DELETE), followed by a pause so student and admin writes get in
+between. Run it from cron with ``scripts/archive_suggestions.py``, ideally
+outside school hours.
+
+Readers:
+- admin list/search read only the hot table unless ``include_archive`` is set;
+- ``/api/me/suggestions`` reads both (``hot_and_archive``), so students never
+  notice the move;
+- dashboard counters are unchanged by archiving: they count both tables.
+
+Archived rows keep their id and are read-only (students can only edit or
+delete pending suggestions anyway; re-answering an archived one is a 404).
+Ids are unique across both tables because the hot table never reuses one:
+SQLite uses AUTOINCREMENT, PostgreSQL a sequence, and MySQL needs 8.0+
+(which persists the auto-increment counter across restarts).
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import Subquery, delete, func, insert, select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.fastjson import SUGGESTION_FIELDS
+from app.models.suggestion import Suggestion, SuggestionArchive
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for ARCHIVE_BATCH_SIZE / --batch-size: keeps each transaction's
+# row locks (and SQLite's database write lock) to a fraction of a second.
+MAX_ARCHIVE_BATCH_SIZE = 2000
+
+_MOVED_COLUMNS = [c.name for c in Suggestion.__table__.columns]
+
+
+def suggestion_columns(model: type) -> list:
+    """The SuggestionOut columns of ``Suggestion`` or ``SuggestionArchive``, in field order."""
+    return [getattr(model, name) for name in SUGGESTION_FIELDS]
+
+
+def hot_and_archive(where: Callable[[type], list], columns: Callable[[type], list] = suggestion_columns) -> Subquery:
+    """UNION ALL of both tables, each filtered with ``where(model)`` (so each side uses its own indexes)."""
+    return union_all(
+        *(select(*columns(model)).where(*where(model)) for model in (Suggestion, SuggestionArchive))
+    ).subquery("suggestions_all")
+
+
+def archive_cutoff(older_than_days: int) -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+
+def _archivable(cutoff: datetime):
+    return select(Suggestion.id).where(Suggestion.status == "answered", Suggestion.answered_at < cutoff)
+
+
+def count_archivable(db: Session, cutoff: datetime) -> int:
+    return db.execute(select(func.count()).select_from(_archivable(cutoff).subquery())).scalar_one()
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> int:
+    """Move up to ``batch_size`` rows in one transaction; returns how many moved."""
+    ids = (
+        db.execute(
+            _archivable(cutoff)
+            .order_by(Suggestion.answered_at, Suggestion.id)
+            .limit(batch_size)
+            .with_for_update(of=Suggestion, skip_locked=True)
+        )
+        .scalars()
+        .all()
+    )
+    if ids:
+        moved = Suggestion.__table__.c
+        db.execute(
+            insert(SuggestionArchive).from_select(
+                _MOVED_COLUMNS,
+                select(*(moved[name] for name in _MOVED_COLUMNS)).where(moved.id.in_(ids)),
+            )
+        )
+        # FTS rows go with them (suggestions_fts_ad trigger); counters stay.
+        db.execute(delete(Suggestion).where(Suggestion.id.in_(ids)))
+    db.commit()
+    return len(ids)
+
+
+def archive_answered(
+    db: Session,
+    older_than_days: int | None = None,
+    batch_size: int | None = None,
+    pause_seconds: float | None = None,
+    max_batches: int | None = None,
+    max_seconds: float | None = None,
+) -> int:
+    """Archive every eligible row batch by batch; returns the number of rows moved.
+
+    Stops early after ``max_batches`` batches or once ``max_seconds`` have
+    passed, leaving the rest for the next run.
+    """
+    older_than_days = settings.ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = settings.ARCHIVE_BATCH_SIZE if batch_size is None else batch_size
+    batch_size = max(1, min(batch_size, MAX_ARCHIVE_BATCH_SIZE))
+    pause_seconds = settings.ARCHIVE_BATCH_PAUSE_SECONDS if pause_seconds is None else pause_seconds
+
+    cutoff = archive_cutoff(older_than_days)
+    started = time.monotonic()
+    total = batches = 0
+    while True:
+        batch_started = time.monotonic()
+        moved = archive_batch(db, cutoff, batch_size)
+        total += moved
+        batches += 1
+        if moved:
+            logger.info(f"Archived {moved} suggestion(s) in {(time.monotonic() - batch_started) * 1000:.0f} ms")
+        if moved < batch_size:
+            break
+        if max_batches is not None and batches >= max_batches:
+            break
+        if max_seconds is not None and time.monotonic() - started >= max_seconds:
+            break
+        time.sleep(pause_seconds)
+    return total
@@ -13,9 +13,55 @@ class Settings(BaseSettings):
 
     DATABASE_URL: str
 
+    # Connection pool: "queue" for a long-running server, "null" behind
+    # PgBouncer / a provider pooler and on serverless (no pool kept per instance).
+    DB_POOL_MODE: str = "queue"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Ping a pooled connection on checkout only after it sat idle this long
+    # (0 = every checkout, negative = never).
+    DB_PRE_PING_IDLE_SECONDS: float = 30.0
+    # Async engine (aiosqlite / asyncpg / aiomysql) for the public read routes;
+    # false keeps every query on the sync engine in the threadpool.
+    DB_ASYNC: bool = True
+
     JWT_SECRET_KEY: str
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 720
 
+    # Authenticated admin identities are cached per (username, iat) so API calls
+    # skip the admins lookup. Revocations from other processes apply after the TTL.
+    ADMIN_CACHE_TTL_SECONDS: float = 60.0
+    ADMIN_CACHE_SIZE: int = 256
+
+    # Password hashing: bcrypt cost (existing hashes are upgraded on login),
+    # dedicated worker threads and how many extra logins may wait for them.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_SIZE: int = 8
+
+    # Failed-login limiter, checked before any bcrypt work.
+    LOGIN_MAX_FAILURES_PER_IP: int = 20
+    LOGIN_MAX_FAILURES_PER_USERNAME: int = 5
+    LOGIN_FAILURE_WINDOW_SECONDS: float = 300.0
+
+    # Write throttling (token buckets): "<count>/<seconds>" allows a burst of
+    # <count> requests, refilled at <count> per <seconds>; "" or "0" disables.
+    # Per-IP limits are generous because a school network shares one address.
+    # "memory" keeps buckets per process; "redis" shares them (RATE_LIMIT_REDIS_URL,
+    # needs `pip install redis`).
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_REDIS_URL: str = ""
+    RATE_LIMIT_SUGGESTION_PER_STUDENT: str = "10/3600"
+    RATE_LIMIT_SUGGESTION_PER_IP: str = "300/3600"
+    RATE_LIMIT_SUBSCRIBE_PER_STUDENT: str = "10/3600"
+    RATE_LIMIT_SUBSCRIBE_PER_IP: str = "300/3600"
+
+    # Use the first X-Forwarded-For hop as the client IP (only behind a trusted proxy, e.g. Vercel)
+    TRUST_FORWARDED_FOR: bool = False
+
     # Comma-separated origins; examples:
     # - http://localhost:3000
     # - https://your-app.vercel.app
@@ -25,6 +71,55 @@ class Settings(BaseSettings):
     VAPID_PUBLIC_KEY: str = ""
     VAPID_PRIVATE_KEY: str = ""
 
+    # Push delivery: max pushes in flight (also the keep-alive pool size)
+    PUSH_CONCURRENCY: int = 8
+    PUSH_TIMEOUT_SECONDS: float = 10.0
+
+    # Push outbox: retries use exponential backoff (base * 2^n, capped)
+    PUSH_OUTBOX_BATCH_SIZE: int = 100
+    PUSH_MAX_ATTEMPTS: int = 8
+    PUSH_RETRY_BASE_SECONDS: float = 30.0
+    PUSH_RETRY_MAX_SECONDS: float = 3600.0
+    # New-suggestion pushes to admins are collected for this long, then sent
+    # once per admin device ("12 new suggestions in the last minute").
+    PUSH_ADMIN_BATCH_WINDOW_SECONDS: float = 60.0
+    # In-process outbox worker (disable on serverless; run scripts/push_worker.py instead)
+    PUSH_WORKER_ENABLED: bool = True
+    PUSH_WORKER_INTERVAL_SECONDS: float = 15.0
+
+    # Archive job (scripts/archive_suggestions.py): answered suggestions older
+    # than ARCHIVE_AFTER_DAYS move to suggestions_archive, ARCHIVE_BATCH_SIZE rows
+    # per transaction (capped at MAX_ARCHIVE_BATCH_SIZE in app/core/archive.py)
+    # with a pause between batches so writers are never blocked for long.
+    ARCHIVE_AFTER_DAYS: int = 365
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.5
+
+    # Answer notifications for /me: SSE stream (disable on serverless, where
+    # clients fall back to long-polling) and the long-poll server-side wait.
+    SSE_ENABLED: bool = True
+    SSE_HEARTBEAT_SECONDS: float = 20.0
+    SSE_MAX_SECONDS: float = 300.0
+    LONGPOLL_TIMEOUT_SECONDS: float = 25.0
+
+    # Prometheus metrics (GET /api/metrics). Scrapers authenticate with
+    # "Authorization: Bearer <METRICS_TOKEN>" or an admin token; addresses in
+    # METRICS_ALLOWED_IPS (comma-separated, e.g. a scraper on a private
+    # network) need neither.
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = ""
+    METRICS_ALLOWED_IPS: str = ""
+    # Requests running more SQL statements / SQL time than this are logged with
+    # their statements; a statement repeated this many times is logged as a
+    # likely N+1 (0 disables each check).
+    DB_QUERY_BUDGET: int = 12
+    DB_QUERY_TIME_BUDGET_SECONDS: float = 1.0
+    DB_REPEATED_QUERY_THRESHOLD: int = 10
+
+    # Suggestion lists: select plain columns and encode with orjson instead of
+    # ORM objects + SuggestionOut validation (same bytes on the wire).
+    FAST_JSON: bool = False
+
     AUTO_CREATE_TABLES: bool = True
 
 
@@ -0,0 +1,43 @@
+"""Weak ETag helpers for conditional GETs.
+
+List endpoints hash the (id, version) pairs of the rows they return: every
+UPDATE bumps a row's ``version`` (updated_at only has second resolution on
+SQLite), and inserts and deletes change the ids. With ``If-None-Match`` the
+same query runs for just those columns first, and a hit is answered with an
+empty 304 without loading or encoding the rows.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Response
+
+# Bump when the response format changes so clients drop cached bodies.
+_FORMAT_VERSION = "1"
+
+
+def weak_etag(*parts: object) -> str:
+    digest = hashlib.blake2b(repr((_FORMAT_VERSION, *parts)).encode("utf-8"), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison (RFC 9110 §13.1.2) against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
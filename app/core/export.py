@@ -0,0 +1,79 @@
+"""Streaming CSV / NDJSON export of suggestions (GET /api/admin/suggestions/export).
+
+Rows are read with ``yield_per`` (a server-side cursor on PostgreSQL/MySQL,
+``fetchmany`` on SQLite) in their own session, and every partition is
+encoded and sent before the next one is fetched, so memory stays flat
+however many rows match. The request's session is already closed while
+the body streams.
+
+- CSV: UTF-8 with a BOM (Excel otherwise opens Korean text as mojibake),
+  header row, ISO-8601 datetimes. Cells starting with ``= + - @`` get a
+  leading ``'`` so spreadsheet apps do not run them as formulas.
+- NDJSON: one SuggestionOut object per line, same encoding as the API.
+
+student_key is never exported.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from datetime import datetime
+from typing import Any, Iterator
+
+from sqlalchemy import Select
+
+from app.core.fastjson import SUGGESTION_FIELDS, fast_json_enabled, orjson
+from app.db.session import SessionLocal
+from app.schemas.suggestion import SuggestionOut
+
+# Rows fetched (and written out) per round trip
+EXPORT_YIELD_PER = 1000
+
+_CSV_BOM = "\ufeff"
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _partitions(statement: Select) -> Iterator[list]:
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=EXPORT_YIELD_PER))
+        for partition in result.partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(statement: Select) -> Iterator[bytes]:
+    """``statement`` selects the SUGGESTION_FIELDS columns in order."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write(_CSV_BOM)
+    writer.writerow(SUGGESTION_FIELDS)
+    yield buffer.getvalue().encode("utf-8")
+    for partition in _partitions(statement):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_cell(value) for value in row] for row in partition)
+        yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(statement: Select) -> Iterator[bytes]:
+    """``statement`` selects the SUGGESTION_FIELDS columns in order."""
+    fast = fast_json_enabled()
+    for partition in _partitions(statement):
+        if fast:
+            lines = [orjson.dumps(dict(zip(SUGGESTION_FIELDS, row)), option=orjson.OPT_UTC_Z) for row in partition]
+        else:
+            lines = [SuggestionOut.model_validate(row).model_dump_json().encode("utf-8") for row in partition]
+        yield b"\n".join(lines) + b"\n"
@@ -0,0 +1,45 @@
+"""Opt-in fast JSON path for the suggestion lists (FAST_JSON).
+
+The default path loads ORM objects, validates each through ``SuggestionOut``
+(from_attributes) and encodes with the stdlib json module. The fast path
+selects only the ``SuggestionOut`` columns, zips each row into a dict in the
+schema's field order and encodes it with orjson. The rows come straight from
+our own table, so re-validating them buys nothing.
+
+The output is byte-identical to the default path: same key order, UTF-8 without
+\\u escapes for non-ASCII, compact separators, and datetimes in the same
+ISO-8601 form as pydantic (``OPT_UTC_Z`` writes UTC as ``Z``).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable
+
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+from app.models.suggestion import Suggestion
+from app.schemas.suggestion import SuggestionOut
+
+try:
+    import orjson
+except ImportError:  # optional: FAST_JSON falls back to the default path
+    orjson = None
+
+# Columns in SuggestionOut field order
+SUGGESTION_FIELDS = tuple(SuggestionOut.model_fields)
+SUGGESTION_COLUMNS = tuple(getattr(Suggestion, name) for name in SUGGESTION_FIELDS)
+
+
+def fast_json_enabled() -> bool:
+    return settings.FAST_JSON and orjson is not None
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def suggestion_dicts(rows: Iterable[tuple]) -> list[dict[str, Any]]:
+    """Rows selected with SUGGESTION_COLUMNS -> SuggestionOut-shaped dicts (extra trailing columns are dropped)."""
+    return [dict(zip(SUGGESTION_FIELDS, row)) for row in rows]
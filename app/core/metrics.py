@@ -0,0 +1,276 @@
+"""In-process Prometheus metrics (text exposition format 0.0.4).
+
+A small registry of counters, gauges and histograms, rendered by
+``GET /api/metrics``. ``MetricsMiddleware`` records per-route latency, the
+in-flight gauge and, through ``QueryTally`` (``app/db/querycount.py``), how
+many SQL statements each request ran; it also applies the query budget.
+
+Values are per process: with several uvicorn workers each one keeps its own
+numbers, so scrape them individually (or run one worker per container).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+from app.core.config import settings
+from app.db.querycount import QueryTally, check_budget, current_tally
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry: list[_Metric] = []
+_collectors: list[Callable[[], Iterable[str]]] = []
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[tuple[str, object]]) -> str:
+    pairs = list(pairs)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_family(name: str, kind: str, help: str, samples: Iterable[tuple[dict[str, object], float]]) -> list[str]:
+    """Exposition lines for one metric family given (labels, value) samples."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_format_labels(labels.items())} {_format_value(value)}" for labels, value in samples]
+    return lines
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], object] = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...]) -> list[tuple[str, str]]:
+        return list(zip(self.labelnames, key))
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + [
+            line for key, value in items for line in self._samples(key, value)
+        ]
+
+    def _samples(self, key: tuple[str, ...], value) -> list[str]:
+        return [f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: object) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts (last one is +Inf), sum]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1])) for key, state in self._values.items())
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + [
+            line for key, value in items for line in self._samples(key, value)
+        ]
+
+    def _samples(self, key: tuple[str, ...], value) -> list[str]:
+        counts, total = value
+        labels = self._labels(key)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            le = _format_labels(labels + [("le", _format_value(bound))])
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+def register_collector(collect: Callable[[], Iterable[str]]) -> None:
+    """Add a callback producing exposition lines at scrape time (e.g. pool gauges)."""
+    _collectors.append(collect)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in _registry:
+        lines += metric.render()
+    for collect in _collectors:
+        lines += collect()
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+http_requests = Counter("http_requests_total", "HTTP responses by route template and status.", ("method", "route", "status"))
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time until the last response byte was sent.", ("method", "route")
+)
+http_requests_in_flight = Gauge("http_requests_in_flight", "Requests currently being handled.")
+http_request_db_queries = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request.",
+    ("route",),
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 30, 50),
+)
+http_request_db_seconds = Histogram(
+    "http_request_db_seconds",
+    "Time spent executing SQL per request.",
+    ("route",),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+db_queries = Counter("db_queries_total", "SQL statements executed.", ("engine",))
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time.",
+    ("engine",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+push_deliveries = Counter(
+    "push_deliveries_total",
+    "Push delivery attempts by outcome and push service status code (\"error\" when no response).",
+    ("outcome", "status"),
+)
+push_delivery_duration = Histogram(
+    "push_delivery_duration_seconds",
+    "Push service round trip per delivery attempt.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    # Mounted apps (static files) only leave their prefix in root_path
+    return scope.get("root_path") or "unmatched"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware, so streaming responses and background tasks are untouched.
+
+    Records the request metrics when METRICS_ENABLED and checks the SQL
+    query budget (DB_QUERY_BUDGET) either way.
+
+    Timing stops when the last body chunk is sent; background tasks that run
+    afterwards (outbox drains) are not counted against the request.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tally = QueryTally()
+        token = current_tally.set(tally)
+        start = time.perf_counter()
+        status = 500
+        finished = False
+        if settings.METRICS_ENABLED:
+            http_requests_in_flight.inc()
+
+        def finish() -> None:
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            route = _route_template(scope)
+            method = scope["method"]
+            check_budget(tally, f"{method} {route}")
+            if not settings.METRICS_ENABLED:
+                return
+            http_requests_in_flight.dec()
+            http_requests.inc(method=method, route=route, status=status)
+            http_request_duration.observe(time.perf_counter() - start, method=method, route=route)
+            http_request_db_queries.observe(tally.queries, route=route)
+            http_request_db_seconds.observe(tally.seconds, route=route)
+
+        async def send_wrapper(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
+            current_tally.reset(token)
@@ -0,0 +1,52 @@
+"""In-process notification hub for "my suggestion was answered" events.
+
+Stream and long-poll handlers wait on the hub instead of polling the
+database; ``admin_answer_suggestion`` publishes to it after committing.
+
+The hub only reaches waiters in the same process. Handlers therefore still
+re-check the database when their wait times out, which covers answers
+committed by another worker or serverless instance.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class AnswerHub:
+    def __init__(self) -> None:
+        self._waiters: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def listen(self, student_key: str) -> Iterator[asyncio.Event]:
+        """Register the calling coroutine; the event is set on every publish."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.setdefault(student_key, set()).add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(student_key)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[student_key]
+
+    def publish(self, student_key: str) -> None:
+        """Wake every listener for ``student_key``. Safe to call from any thread."""
+        with self._lock:
+            waiters = list(self._waiters.get(student_key, ()))
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Listener's loop already closed; it unregisters on its own.
+                pass
+
+
+answer_hub = AnswerHub()
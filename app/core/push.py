@@ -0,0 +1,579 @@
+"""Web Push delivery engine.
+
+Routers never send pushes inline. They write rows to the ``push_outbox`` table
+in their own transaction, and the outbox is drained after the response is
+returned (FastAPI ``BackgroundTasks``), by the in-process ``OutboxWorker`` and
+by ``scripts/push_worker.py``.
+
+Draining sends concurrently from a bounded worker pool over one shared
+keep-alive HTTP connection pool, retries transient failures with exponential
+backoff (honoring Retry-After), and prunes subscriptions that return 404/410.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from sqlalchemy import DateTime, case, delete, insert, literal, select, update
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.push import PushOutbox, PushSubscription
+
+if TYPE_CHECKING:
+    import requests
+
+logger = logging.getLogger(__name__)
+
+# requests, PyJWT and cryptography are imported on first use: they are only
+# needed when a push is actually sent, and they dominate cold-start import time.
+
+
+@dataclass(frozen=True)
+class PushTarget:
+    """Plain snapshot of a subscription, safe to use after the DB session closes."""
+
+    id: int
+    endpoint: str
+
+
+_http: requests.Session | None = None
+_executor: ThreadPoolExecutor | None = None
+_init_lock = threading.Lock()
+
+# VAPID JWTs are valid for 12h and only depend on the push service origin,
+# so one signed token per audience is reused until shortly before it expires.
+_VAPID_TOKEN_LIFETIME = 12 * 3600
+_VAPID_TOKEN_REFRESH_MARGIN = 30 * 60
+_vapid_tokens: dict[str, tuple[str, int]] = {}
+_vapid_lock = threading.Lock()
+
+
+def _get_http() -> requests.Session:
+    """Shared HTTP session; connections to each push service are kept alive."""
+    global _http
+    if _http is None:
+        with _init_lock:
+            if _http is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=8,
+                    pool_maxsize=settings.PUSH_CONCURRENCY,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http = session
+    return _http
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _init_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PUSH_CONCURRENCY,
+                    thread_name_prefix="push",
+                )
+    return _executor
+
+
+def push_enabled() -> bool:
+    return bool(settings.VAPID_PRIVATE_KEY and settings.VAPID_PUBLIC_KEY)
+
+
+@lru_cache(maxsize=1)
+def _load_vapid_private_key():
+    """
+    Load VAPID private key from settings (parsed once per process).
+
+    지원 포맷:
+    - EC PEM 문자열 (-----BEGIN ... 로 시작)
+    - URL-safe base64 (web-push, node-web-push 가 출력하는 43/44자짜리 키)
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    raw = settings.VAPID_PRIVATE_KEY.strip()
+    if not raw:
+        raise RuntimeError("VAPID_PRIVATE_KEY is not configured")
+
+    # 1) PEM 포맷인 경우 그대로 파싱
+    if raw.startswith("-----BEGIN"):
+        return serialization.load_pem_private_key(raw.encode("utf-8"), password=None)
+
+    # 2) URL-safe base64 → 32바이트 시드 → EC 프라이빗 키로 변환
+    key_b64 = raw.replace("-", "+").replace("_", "/")
+    padding = 4 - len(key_b64) % 4
+    if padding != 4:
+        key_b64 += "=" * padding
+    seed = base64.b64decode(key_b64)
+
+    if len(seed) != 32:
+        # SECP256R1 에 맞는 32바이트 키가 아니면 명확히 에러를 던진다
+        raise ValueError("VAPID private key must be 32 bytes when given as base64")
+
+    # RFC8292 (VAPID) 는 P-256(SECP256R1)을 사용
+    return ec.derive_private_key(int.from_bytes(seed, "big"), ec.SECP256R1())
+
+
+def _create_vapid_jwt(endpoint: str) -> tuple[str, str]:
+    """Return a VAPID JWT for the endpoint's push service, signing only on cache miss."""
+    # Get audience from endpoint (scheme://host)
+    # endpoint: https://fcm.googleapis.com/fcm/send/xxx
+    # aud: https://fcm.googleapis.com
+    parsed = urlparse(endpoint)
+    aud = f"{parsed.scheme}://{parsed.netloc}"
+
+    now = int(time.time())
+    cached = _vapid_tokens.get(aud)
+    if cached and cached[1] - _VAPID_TOKEN_REFRESH_MARGIN > now:
+        return cached[0], settings.VAPID_PUBLIC_KEY
+
+    with _vapid_lock:
+        cached = _vapid_tokens.get(aud)
+        if cached and cached[1] - _VAPID_TOKEN_REFRESH_MARGIN > now:
+            return cached[0], settings.VAPID_PUBLIC_KEY
+
+        import jwt
+
+        # cryptography EC 키 객체로 생성 (PEM / base64 모두 지원)
+        private_key = _load_vapid_private_key()
+
+        # Create JWT (12시간 유효)
+        exp = now + _VAPID_TOKEN_LIFETIME
+        payload = {
+            "aud": aud,
+            "exp": exp,
+            "sub": "mailto:admin@school.local",
+        }
+
+        token = jwt.encode(payload, private_key, algorithm="ES256")
+        _vapid_tokens[aud] = (token, exp)
+    return token, settings.VAPID_PUBLIC_KEY
+
+
+@dataclass(frozen=True)
+class PushResult:
+    """Outcome of one delivery attempt."""
+
+    ok: bool
+    status_code: int | None = None
+    retry_after: float | None = None
+    error: str | None = None
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def deliver(sub: PushTarget, title: str, body: str) -> PushResult:
+    """Send a single push notification and report what the push service said."""
+    start = time.perf_counter()
+    result = _send(sub, title, body)
+    metrics.push_delivery_duration.observe(time.perf_counter() - start)
+    metrics.push_deliveries.inc(outcome="sent" if result.ok else "failed", status=result.status_code or "error")
+    return result
+
+
+def _send(sub: PushTarget, title: str, body: str) -> PushResult:
+    try:
+        # Create VAPID JWT
+        vapid_token, vapid_key = _create_vapid_jwt(sub.endpoint)
+
+        # Prepare push message
+        message = json.dumps({
+            "title": title,
+            "body": body,
+            "icon": "/assets/icon.png",
+            "tag": f"suggestion-{sub.id}"
+        })
+
+        # Send push over the shared keep-alive pool
+        response = _get_http().post(
+            sub.endpoint,
+            data=message,
+            headers={
+                "Content-Type": "application/json",
+                "TTL": "86400",
+                "Authorization": f"vapid t={vapid_token}, k={vapid_key}"
+            },
+            timeout=settings.PUSH_TIMEOUT_SECONDS,
+        )
+
+        if response.status_code in (200, 201, 202):
+            logger.info(f"Push sent to {sub.endpoint[:50]}...")
+            return PushResult(ok=True, status_code=response.status_code)
+
+        logger.warning(f"Push failed: {response.status_code} - {response.text[:100]}")
+        return PushResult(
+            ok=False,
+            status_code=response.status_code,
+            retry_after=_parse_retry_after(response.headers.get("Retry-After")),
+            error=response.text[:200],
+        )
+
+    except Exception as e:
+        logger.error(f"Push error: {e}")
+        return PushResult(ok=False, error=str(e)[:200])
+
+
+def send_push_notification_to_subscription(sub: PushTarget, title: str, body: str) -> bool:
+    """Send a single push notification to a subscription."""
+    if not push_enabled():
+        logger.warning("VAPID keys not configured, skipping push")
+        metrics.push_deliveries.inc(outcome="skipped", status="none")
+        return False
+    return deliver(sub, title, body).ok
+
+
+# ---------------------------------------------------------------------------
+# Outbox
+# ---------------------------------------------------------------------------
+
+def enqueue_push(db: Session, title: str, body: str | ColumnElement, *criteria) -> None:
+    """Queue a notification for every subscription matching ``criteria``.
+
+    This is a single INSERT ... SELECT executed on the caller's session, so the
+    outbox rows commit (or roll back) together with the caller's change.
+    ``body`` may be an SQL expression over PushSubscription (per-row text).
+    """
+    now = datetime.now(timezone.utc)
+    db.execute(
+        insert(PushOutbox).from_select(
+            ["subscription_id", "title", "body", "attempts", "next_attempt_at"],
+            select(
+                PushSubscription.id,
+                literal(title[:200]),
+                body if isinstance(body, ColumnElement) else literal(body),
+                literal(0),
+                literal(now, DateTime(timezone=True)),
+            ).where(*criteria),
+        )
+    )
+
+
+def enqueue_student_answer(db: Session, student_key: str, suggestion_title: str) -> None:
+    enqueue_push(db, "새 답변이 도착했어요", suggestion_title, PushSubscription.student_key == student_key)
+
+
+def enqueue_student_answers(db: Session, titles_by_student: dict[str, list[str]]) -> None:
+    """Bulk answers: one push per student device, however many of their suggestions were answered.
+
+    Still a single INSERT ... SELECT; the body is picked per student with CASE.
+    """
+    if not titles_by_student:
+        return
+    bodies = {
+        key: titles[0] if len(titles) == 1 else f"{titles[0][:30]} 외 {len(titles) - 1}건에 답변이 달렸어요"
+        for key, titles in titles_by_student.items()
+    }
+    enqueue_push(
+        db,
+        "새 답변이 도착했어요",
+        case(bodies, value=PushSubscription.student_key),
+        PushSubscription.student_key.in_(list(bodies)),
+    )
+
+
+ADMIN_NEW_SUGGESTION_KEY = "admin-new-suggestion"
+
+
+def enqueue_admin_new_suggestion(db: Session, suggestion_title: str) -> None:
+    """Add one new suggestion to every admin device's pending batch.
+
+    Two statements regardless of how many admin devices exist: bump the
+    devices that already have an open batch, then open a batch (due when the
+    window elapses) for the ones that do not.
+    """
+    now = datetime.now(timezone.utc)
+    due = now + timedelta(seconds=settings.PUSH_ADMIN_BATCH_WINDOW_SECONDS)
+
+    db.execute(
+        update(PushOutbox)
+        .where(PushOutbox.collapse_key == ADMIN_NEW_SUGGESTION_KEY)
+        .values(batch_count=PushOutbox.batch_count + 1)
+    )
+
+    pending = (
+        select(PushOutbox.id)
+        .where(PushOutbox.subscription_id == PushSubscription.id)
+        .where(PushOutbox.collapse_key == ADMIN_NEW_SUGGESTION_KEY)
+    )
+    db.execute(
+        insert(PushOutbox).from_select(
+            ["subscription_id", "title", "body", "attempts", "next_attempt_at", "collapse_key", "batch_count"],
+            select(
+                PushSubscription.id,
+                literal(f"새 건의 등록: {suggestion_title[:30]}..."),
+                literal("학생이 새로운 건의사항을 등록했습니다."),
+                literal(0),
+                literal(due, DateTime(timezone=True)),
+                literal(ADMIN_NEW_SUGGESTION_KEY),
+                literal(1),
+            ).where(PushSubscription.admin_id.isnot(None), ~pending.exists()),
+        )
+    )
+
+
+def _render(row) -> tuple[str, str]:
+    """Title/body for an outbox row, summarising merged batches."""
+    if row.batch_count <= 1:
+        return row.title, row.body
+    window = settings.PUSH_ADMIN_BATCH_WINDOW_SECONDS
+    span = f"{int(window // 60)}분" if window >= 60 else f"{int(window)}초"
+    return (
+        f"새 건의 {row.batch_count}건 등록",
+        f"최근 {span} 동안 학생들이 새로운 건의사항을 {row.batch_count}건 등록했습니다.",
+    )
+
+
+def _retry_delay(attempts: int, retry_after: float | None) -> float:
+    delay = min(settings.PUSH_RETRY_BASE_SECONDS * (2 ** (attempts - 1)), settings.PUSH_RETRY_MAX_SECONDS)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+_drain_lock = threading.Lock()
+# Set by a drain that found another one running: the running one goes round again.
+_drain_again = threading.Event()
+
+
+def _lease_seconds(batch_size: int) -> float:
+    """How long a claimed batch stays invisible to other workers.
+
+    Covers the slowest possible send: PUSH_CONCURRENCY rows go out at a time,
+    and each request can take its connect and its read timeout, plus a margin.
+    """
+    waves = math.ceil(batch_size / settings.PUSH_CONCURRENCY)
+    return waves * settings.PUSH_TIMEOUT_SECONDS * 2 + settings.PUSH_TIMEOUT_SECONDS
+
+
+def _claim_batch(db: Session, batch_size: int) -> list:
+    """Lease a batch of due rows so concurrent workers do not send them twice."""
+    now = datetime.now(timezone.utc)
+    rows = db.execute(
+        select(
+            PushOutbox.id,
+            PushOutbox.subscription_id,
+            PushOutbox.title,
+            PushOutbox.body,
+            PushOutbox.attempts,
+            PushOutbox.batch_count,
+            PushSubscription.endpoint,
+        )
+        .outerjoin(PushSubscription, PushSubscription.id == PushOutbox.subscription_id)
+        .where(PushOutbox.next_attempt_at <= now)
+        .order_by(PushOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(of=PushOutbox, skip_locked=True)
+    ).all()
+    if rows:
+        lease_until = now + timedelta(seconds=_lease_seconds(batch_size))
+        # Clearing collapse_key closes a batch: later events open a new one
+        # instead of bumping a row that is already being delivered.
+        db.execute(
+            update(PushOutbox)
+            .where(PushOutbox.id.in_([r.id for r in rows]))
+            .values(next_attempt_at=lease_until, collapse_key=None)
+        )
+    db.commit()
+    return rows
+
+
+def _record_results(db: Session, rows: list, results: list[PushResult]) -> None:
+    now = datetime.now(timezone.utc)
+    done: list[int] = []
+    gone: set[int] = set()
+
+    for row, result in zip(rows, results):
+        if row.endpoint is None:
+            # Subscription was removed after the row was queued.
+            done.append(row.id)
+        elif result.ok:
+            done.append(row.id)
+        elif result.status_code in (404, 410):
+            gone.add(row.subscription_id)
+        elif result.status_code is None or result.status_code == 429 or result.status_code >= 500:
+            attempts = row.attempts + 1
+            if attempts >= settings.PUSH_MAX_ATTEMPTS:
+                logger.warning(f"Push dropped after {attempts} attempts: outbox id={row.id}")
+                done.append(row.id)
+                continue
+            db.execute(
+                update(PushOutbox)
+                .where(PushOutbox.id == row.id)
+                .values(
+                    attempts=attempts,
+                    next_attempt_at=now + timedelta(seconds=_retry_delay(attempts, result.retry_after)),
+                    last_error=(result.error or str(result.status_code))[:255],
+                )
+            )
+        else:
+            # Other 4xx: the request itself is wrong, retrying will not help.
+            logger.warning(f"Push rejected ({result.status_code}), dropping outbox id={row.id}")
+            done.append(row.id)
+
+    if done:
+        db.execute(delete(PushOutbox).where(PushOutbox.id.in_(done)))
+    if gone:
+        logger.info(f"Pruning {len(gone)} expired push subscription(s)")
+        db.execute(delete(PushOutbox).where(PushOutbox.subscription_id.in_(gone)))
+        db.execute(delete(PushSubscription).where(PushSubscription.id.in_(gone)))
+    db.commit()
+
+
+def _drain(batch_size: int) -> int:
+    processed = 0
+    db = SessionLocal()
+    try:
+        while True:
+            rows = _claim_batch(db, batch_size)
+            if not rows:
+                break
+
+            executor = _get_executor()
+            futures = [
+                executor.submit(deliver, PushTarget(id=r.subscription_id, endpoint=r.endpoint), *_render(r))
+                if r.endpoint is not None
+                else None
+                for r in rows
+            ]
+            results = [f.result() if f is not None else PushResult(ok=False) for f in futures]
+            _record_results(db, rows, results)
+
+            processed += len(rows)
+            if len(rows) < batch_size:
+                break
+    except Exception as e:
+        logger.error(f"Outbox drain failed: {e}")
+        db.rollback()
+    finally:
+        db.close()
+    return processed
+
+
+def drain_outbox(batch_size: int | None = None) -> int:
+    """Deliver every due outbox row, one leased batch at a time.
+
+    Returns the number of rows processed. When a drain is already running in
+    this process (the worker thread or an earlier request's background task)
+    this returns 0 at once instead of holding a threadpool thread: the
+    running drain goes round once more and picks up the new rows.
+    """
+    if not push_enabled():
+        return 0
+
+    batch_size = batch_size or settings.PUSH_OUTBOX_BATCH_SIZE
+    processed = 0
+    while _drain_lock.acquire(blocking=False):
+        try:
+            _drain_again.clear()
+            processed += _drain(batch_size)
+        finally:
+            _drain_lock.release()
+        if not _drain_again.is_set():
+            break
+    else:
+        _drain_again.set()
+    return processed
+
+
+_redrain_lock = threading.Lock()
+_redrain_timer: threading.Timer | None = None
+# time.monotonic() deadline of the latest re-drain asked for.
+_redrain_at = 0.0
+
+
+def schedule_admin_batch_drain() -> None:
+    """Drain again once the admin batch window that just opened has closed.
+
+    The batched "new suggestion" rows only become due after
+    PUSH_ADMIN_BATCH_WINDOW_SECONDS, when the request's own background drain
+    is long over. The OutboxWorker picks them up; without it
+    (PUSH_WORKER_ENABLED=false) one timer per process does, re-armed while
+    later batches are still open. Serverless runtimes may freeze the process
+    before it fires, so scripts/push_worker.py --once is still needed there.
+    """
+    global _redrain_at
+    if settings.PUSH_WORKER_ENABLED or not push_enabled():
+        return
+    delay = settings.PUSH_ADMIN_BATCH_WINDOW_SECONDS
+    with _redrain_lock:
+        _redrain_at = max(_redrain_at, time.monotonic() + delay)
+        if _redrain_timer is None:
+            _start_redrain_timer(delay)
+
+
+def _start_redrain_timer(delay: float) -> None:
+    global _redrain_timer
+    _redrain_timer = threading.Timer(delay, _redrain)
+    _redrain_timer.daemon = True
+    _redrain_timer.start()
+
+
+def _redrain() -> None:
+    global _redrain_timer
+    drain_outbox()
+    with _redrain_lock:
+        _redrain_timer = None
+        remaining = _redrain_at - time.monotonic()
+        if remaining > 0:
+            _start_redrain_timer(remaining)
+
+
+class OutboxWorker:
+    """In-process background thread that drains the outbox periodically."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="push-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + settings.PUSH_TIMEOUT_SECONDS)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            drain_outbox()
+            self._stop.wait(self.interval)
@@ -0,0 +1,227 @@
+"""Request limiters."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class FailureLimiter:
+    """Sliding-window counter of failures per key (e.g. "ip:1.2.3.4", "user:admin").
+
+    A key is blocked once it has ``limit`` failures within ``window`` seconds.
+    Checking is O(1) per key and needs no I/O, so it runs before any expensive
+    work. Memory is bounded: idle keys expire and at most ``max_keys`` are kept.
+    """
+
+    def __init__(self, window: float, max_keys: int = 10_000):
+        self.window = window
+        self._failures: TTLCache[str, deque[float]] = TTLCache(maxsize=max_keys, ttl=window)
+        self._lock = threading.Lock()
+
+    def _recent(self, key: str, now: float) -> deque[float] | None:
+        failures = self._failures.get(key)
+        if failures is not None:
+            while failures and failures[0] <= now - self.window:
+                failures.popleft()
+        return failures
+
+    def retry_after(self, limits: dict[str, int]) -> float | None:
+        """Seconds until every key is below its limit, or None if none is blocked."""
+        now = time.monotonic()
+        wait = None
+        with self._lock:
+            for key, limit in limits.items():
+                failures = self._recent(key, now)
+                if failures is not None and len(failures) >= limit:
+                    key_wait = failures[len(failures) - limit] + self.window - now
+                    wait = max(wait or 0.0, key_wait)
+        return wait
+
+    def record_failure(self, *keys: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                failures = self._recent(key, now)
+                if failures is None:
+                    failures = deque()
+                failures.append(now)
+                # Re-set to refresh the idle TTL.
+                self._failures.set(key, failures)
+
+    def reset(self, *keys: str) -> None:
+        with self._lock:
+            self._failures.discard_where(lambda k, _: k in keys)
+
+
+# ---------------------------------------------------------------------------
+# Token buckets (write throttling)
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class RateLimit:
+    """A burst of ``capacity`` requests, refilled at ``capacity`` per ``period`` seconds."""
+
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+
+def parse_rate_limit(raw: str) -> RateLimit | None:
+    """``"10/3600"`` -> 10 requests per hour (burst of 10); ``""`` or ``"0"`` disables."""
+    raw = (raw or "").strip()
+    if not raw or raw == "0":
+        return None
+    count, _, period = raw.partition("/")
+    try:
+        limit = RateLimit(capacity=int(count), period=float(period or 1))
+    except ValueError:
+        raise ValueError(f"Rate limit must look like '<count>/<seconds>', got {raw!r}") from None
+    if limit.capacity <= 0 or limit.period <= 0:
+        return None
+    return limit
+
+
+class MemoryTokenBuckets:
+    """Per-process buckets: O(1) per key, idle keys dropped once they would be full again."""
+
+    def __init__(self, idle_ttl: float, max_keys: int = 100_000):
+        # key -> (tokens, updated_at)
+        self._buckets: TTLCache[str, tuple[float, float]] = TTLCache(maxsize=max_keys, ttl=idle_ttl)
+        self._lock = threading.Lock()
+
+    def take(self, limits: dict[str, RateLimit]) -> float | None:
+        """Take one token from every key, or none if any is empty.
+
+        Returns None when allowed, otherwise the seconds until it would be.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = {}
+            wait = 0.0
+            for key, limit in limits.items():
+                tokens, updated_at = self._buckets.get(key) or (float(limit.capacity), now)
+                tokens = min(float(limit.capacity), tokens + (now - updated_at) * limit.rate)
+                levels[key] = tokens
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / limit.rate)
+            if wait > 0:
+                return wait
+            for key, tokens in levels.items():
+                self._buckets.set(key, (tokens - 1, now))
+        return None
+
+
+# Same algorithm as MemoryTokenBuckets, atomically on the Redis server (one round trip).
+# KEYS: bucket keys; ARGV: capacity, rate pairs per key.
+_REDIS_TAKE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[2 * i - 1])
+  local rate = tonumber(ARGV[2 * i])
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(state[1]) or capacity
+  local ts = tonumber(state[2]) or now
+  tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+  levels[i] = tokens
+  if tokens < 1 then
+    wait = math.max(wait, (1 - tokens) / rate)
+  end
+end
+if wait > 0 then
+  return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[2 * i - 1])
+  local rate = tonumber(ARGV[2 * i])
+  redis.call('HSET', key, 'tokens', tostring(levels[i] - 1), 'ts', tostring(now))
+  redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+end
+return '0'
+"""
+
+
+class RedisTokenBuckets:
+    """Buckets shared by every process/instance through Redis (or anything speaking its protocol).
+
+    If Redis cannot be reached the request is let through and a warning is
+    logged: throttling is a safety net, not a reason to take writes down.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        import redis  # optional dependency, only with RATE_LIMIT_BACKEND=redis
+
+        self.prefix = prefix
+        # RESP2: understood by every Redis version and protocol-compatible stand-in
+        self._client = redis.Redis.from_url(url, protocol=2, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._errors = redis.RedisError
+        self._no_script = redis.exceptions.NoScriptError
+        self._sha: str | None = None
+
+    def _evalsha(self, keys: list[str], args: list) -> bytes:
+        # SCRIPT LOAD once, then EVALSHA; reload if the server lost its script cache (restart).
+        if self._sha is None:
+            self._sha = self._client.script_load(_REDIS_TAKE)
+        try:
+            return self._client.evalsha(self._sha, len(keys), *keys, *args)
+        except self._no_script:
+            self._sha = self._client.script_load(_REDIS_TAKE)
+            return self._client.evalsha(self._sha, len(keys), *keys, *args)
+
+    def take(self, limits: dict[str, RateLimit]) -> float | None:
+        keys = [self.prefix + key for key in limits]
+        args = [value for limit in limits.values() for value in (limit.capacity, repr(limit.rate))]
+        try:
+            wait = float(self._evalsha(keys, args))
+        except self._errors as e:
+            logger.warning(f"Rate limiter backend unavailable, allowing request: {e}")
+            return None
+        return wait if wait > 0 else None
+
+
+_buckets: MemoryTokenBuckets | RedisTokenBuckets | None = None
+_buckets_lock = threading.Lock()
+
+
+def get_token_buckets() -> MemoryTokenBuckets | RedisTokenBuckets:
+    """The configured backend (RATE_LIMIT_BACKEND), created on first use."""
+    global _buckets
+    if _buckets is None:
+        with _buckets_lock:
+            if _buckets is None:
+                _buckets = _create_token_buckets()
+    return _buckets
+
+
+def _create_token_buckets() -> MemoryTokenBuckets | RedisTokenBuckets:
+    backend = settings.RATE_LIMIT_BACKEND.lower()
+    if backend == "redis":
+        if not settings.RATE_LIMIT_REDIS_URL:
+            raise ValueError("RATE_LIMIT_BACKEND=redis needs RATE_LIMIT_REDIS_URL")
+        return RedisTokenBuckets(settings.RATE_LIMIT_REDIS_URL)
+    if backend != "memory":
+        raise ValueError(f"RATE_LIMIT_BACKEND must be 'memory' or 'redis', got {settings.RATE_LIMIT_BACKEND!r}")
+    configured = [
+        parse_rate_limit(raw)
+        for raw in (
+            settings.RATE_LIMIT_SUGGESTION_PER_STUDENT,
+            settings.RATE_LIMIT_SUGGESTION_PER_IP,
+            settings.RATE_LIMIT_SUBSCRIBE_PER_STUDENT,
+            settings.RATE_LIMIT_SUBSCRIBE_PER_IP,
+        )
+    ]
+    return MemoryTokenBuckets(idle_ttl=max((limit.period for limit in configured if limit), default=60.0))
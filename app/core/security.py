@@ -2,24 +2,70 @@
 
 from __future__ import annotations
 
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
-
-from jose import jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+# python-jose and passlib are imported on first use to keep cold starts fast:
+# most requests never hash a password, and token checks hit the admin cache.
+
+
+class TokenError(Exception):
+    """The token is malformed, forged or expired."""
+
+
+@lru_cache(maxsize=1)
+def pwd_context() -> "CryptContext":
+    from passlib.context import CryptContext
+
+    # Hashes with a different cost than BCRYPT_ROUNDS are reported as needing an
+    # update by verify_and_update, which is how rehash-on-login works.
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+class PasswordHasherBusy(Exception):
+    """Raised when the bcrypt queue is full; callers should answer 429."""
+
+
+# bcrypt runs on its own small pool so a login storm cannot occupy the threads
+# that serve the rest of the API. At most WORKERS + QUEUE_SIZE jobs are accepted.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_QUEUE_SIZE)
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def verify_password(plain_password: str, password_hash: str) -> bool:
-    return pwd_context.verify(plain_password, password_hash)
+    return pwd_context().verify(plain_password, password_hash)
+
+
+async def verify_password_offloaded(plain_password: str, password_hash: str) -> tuple[bool, str | None]:
+    """Verify on the bcrypt pool.
+
+    Returns (valid, new_hash); new_hash is set when the stored hash should be
+    replaced (e.g. BCRYPT_ROUNDS changed). Raises PasswordHasherBusy instead
+    of queueing when the pool is saturated.
+    """
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        future = _hash_executor.submit(pwd_context().verify_and_update, plain_password, password_hash)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    # Release when the job finishes, even if the awaiting request is cancelled.
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
 
 
 def create_access_token(*, subject: str, expires_minutes: int | None = None, extra: dict[str, Any] | None = None) -> str:
@@ -41,8 +87,15 @@ def create_access_token(*, subject: str, expires_minutes: int | None = None, ext
     if extra:
         payload.update(extra)
 
+    from jose import jwt
+
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm="HS256")
 
 
 def decode_token(token: str) -> dict[str, Any]:
-    return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=["HS256"])
+    from jose import JWTError, jwt
+
+    try:
+        return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=["HS256"])
+    except JWTError as e:
+        raise TokenError(str(e)) from e
@@ -0,0 +1,178 @@
+"""In-memory manifest of ``public/`` for local serving.
+
+Built once at startup: every file is read, hashed and (for text types)
+precompressed with gzip, and with brotli when the optional ``brotli``
+package is installed. Requests are answered from memory by exact path
+lookup, so there are no per-request filesystem calls and no way to reach
+files outside ``public/``.
+
+- ``/assets/*`` files are also published under a content-hashed name
+  (``/assets/app.3f2a9c1e.js``) with ``Cache-Control: immutable``; the HTML
+  pages are rewritten at build time to reference those names.
+- Everything else (HTML, ``sw.js``, plain ``/assets/...`` URLs) is served with
+  ``no-cache`` and a strong ETag, so repeat visits get a 304.
+- Unknown extensionless paths fall back to ``index.html`` (SPA routing).
+  Unknown ``assets/*`` paths and anything with a file extension are 404, so
+  a stale hashed asset name never gets HTML back as a script or stylesheet.
+
+Files edited after startup are picked up on the next restart.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import re
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from fastapi import Response
+
+from app.core.etag import etag_matches
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, no-cache"
+
+_COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml", "image/x-icon")
+_MIN_COMPRESS_BYTES = 256
+
+
+@dataclass
+class StaticFile:
+    content_type: str
+    cache_control: str
+    etag: str
+    # encoding ("identity", "br", "gzip") -> body
+    bodies: dict[str, bytes] = field(default_factory=dict)
+
+
+def _compress(data: bytes, content_type: str) -> dict[str, bytes]:
+    bodies = {"identity": data}
+    if len(data) < _MIN_COMPRESS_BYTES or not content_type.startswith(_COMPRESSIBLE):
+        return bodies
+    gz = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz) < len(data):
+        bodies["gzip"] = gz
+    try:
+        import brotli
+    except ImportError:
+        return bodies
+    br = brotli.compress(data, quality=11)
+    if len(br) < len(data):
+        bodies["br"] = br
+    return bodies
+
+
+def _content_type(path: Path) -> str:
+    if path.suffix == ".js":
+        return "application/javascript; charset=utf-8"
+    content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if content_type.startswith("text/"):
+        content_type += "; charset=utf-8"
+    return content_type
+
+
+def _hashed_name(url: str, digest: str) -> str:
+    stem, dot, suffix = url.rpartition(".")
+    if not dot or "/" in suffix:
+        return f"{url}.{digest[:8]}"
+    return f"{stem}.{digest[:8]}.{suffix}"
+
+
+def _accepted_encodings(accept_encoding: str | None) -> set[str]:
+    accepted = set()
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in {"0", "0.0", "0.00", "0.000"}:
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+class StaticManifest:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self.files: dict[str, StaticFile] = {}
+        self._lock = threading.Lock()
+        self._built = False
+
+    def build(self) -> None:
+        with self._lock:
+            if self._built:
+                return
+            self._build()
+            self._built = True
+
+    def _build(self) -> None:
+        files: dict[str, StaticFile] = {}
+        raw: dict[str, bytes] = {}
+        for path in sorted(self.root.rglob("*")):
+            if path.is_file() and not any(part.startswith(".") for part in path.relative_to(self.root).parts):
+                raw[path.relative_to(self.root).as_posix()] = path.read_bytes()
+
+        # Assets first: pages need their hashed names.
+        hashed: dict[str, str] = {}
+        for rel, data in raw.items():
+            if rel.startswith("assets/"):
+                digest = hashlib.sha256(data).hexdigest()
+                hashed[f"/{rel}"] = _hashed_name(f"/{rel}", digest)
+
+        if hashed:
+            pattern = re.compile(r"""(["'])(%s)\1""" % "|".join(re.escape(url) for url in sorted(hashed, key=len, reverse=True)))
+        for rel, data in raw.items():
+            path = self.root / rel
+            content_type = _content_type(path)
+            if hashed and path.suffix == ".html":
+                data = pattern.sub(lambda m: f"{m.group(1)}{hashed[m.group(2)]}{m.group(1)}", data.decode("utf-8")).encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()
+            entry = StaticFile(
+                content_type=content_type,
+                cache_control=REVALIDATE,
+                etag=f'"{digest[:32]}"',
+                bodies=_compress(data, content_type),
+            )
+            files[rel] = entry
+            if f"/{rel}" in hashed:
+                files[hashed[f"/{rel}"].lstrip("/")] = StaticFile(
+                    content_type=entry.content_type,
+                    cache_control=IMMUTABLE,
+                    etag=entry.etag,
+                    bodies=entry.bodies,
+                )
+
+        self.files = files
+        total = sum(len(f.bodies["identity"]) for f in files.values())
+        logger.info(f"Static manifest: {len(raw)} files ({total} bytes), {len(hashed)} hashed assets")
+
+    def lookup(self, path: str) -> StaticFile | None:
+        self.build()
+        entry = self.files.get(path)
+        if entry is not None or path.startswith("assets/") or "." in path.rsplit("/", 1)[-1]:
+            return entry
+        return self.files.get("index.html")
+
+    def response(self, path: str, if_none_match: str | None, accept_encoding: str | None) -> Response:
+        entry = self.lookup(path)
+        if entry is None:
+            return Response(status_code=404)
+
+        encodings = entry.bodies.keys() - {"identity"}
+        accepted = _accepted_encodings(accept_encoding) if encodings else set()
+        encoding = next((e for e in ("br", "gzip") if e in encodings and e in accepted), "identity")
+        # Strong ETags differ per representation (RFC 9110 §8.8.3)
+        etag = entry.etag if encoding == "identity" else f'{entry.etag[:-1]}-{encoding}"'
+
+        headers = {"ETag": etag, "Cache-Control": entry.cache_control}
+        if encodings:
+            headers["Vary"] = "Accept-Encoding"
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=entry.bodies[encoding], media_type=entry.content_type, headers=headers)
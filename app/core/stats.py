@@ -0,0 +1,191 @@
+"""Incrementally maintained dashboard statistics.
+
+Routes call the ``record_*`` helpers on their own session before committing,
+so counters change in the same transaction as the suggestion itself. Each
+helper is one or two upserts (``count = count + delta``), safe under
+concurrent writers.
+
+Time-to-answer is kept as a histogram with four buckets per doubling,
+starting at one second: bucket 0 is [0, 1s), bucket i covers
+[2^((i-1)/4), 2^(i/4)) seconds. Percentiles are interpolated inside
+the bucket (within ~19% of the exact value); the average is exact. Reading
+the stats is two small table scans whose size does not depend on the
+number of suggestions.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.db.upsert import upsert_increment
+from app.models.stats import AnswerTimeBucket, SuggestionCount
+from app.models.suggestion import Suggestion, SuggestionArchive
+from app.schemas.stats import AnswerTimeStats, GradeCount, StatsOut
+
+_BUCKETS_PER_DOUBLING = 4
+_FIRST_BOUND_SECONDS = 1.0
+_MAX_BUCKET = 120  # 2^30 s ≈ 34 years: far beyond any real answer time
+
+GRADES = (1, 2, 3)
+STATUSES = ("pending", "answered")
+
+
+def _bucket_for(seconds: float) -> int:
+    if seconds < _FIRST_BOUND_SECONDS:
+        return 0
+    bucket = math.floor(_BUCKETS_PER_DOUBLING * math.log2(seconds / _FIRST_BOUND_SECONDS)) + 1
+    return min(bucket, _MAX_BUCKET)
+
+
+def _bucket_bounds(bucket: int) -> tuple[float, float]:
+    if bucket == 0:
+        return 0.0, _FIRST_BOUND_SECONDS
+    return (
+        _FIRST_BOUND_SECONDS * 2 ** ((bucket - 1) / _BUCKETS_PER_DOUBLING),
+        _FIRST_BOUND_SECONDS * 2 ** (bucket / _BUCKETS_PER_DOUBLING),
+    )
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # SQLite returns naive datetimes (stored as UTC)
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def _answer_seconds(created_at: datetime, answered_at: datetime) -> float:
+    return max(0.0, (_as_utc(answered_at) - _as_utc(created_at)).total_seconds())
+
+
+def _bump(db: Session, grade: int, status: str, delta: int) -> None:
+    upsert_increment(db, SuggestionCount.__table__, {"grade": grade, "status": status}, {"count": delta})
+
+
+def record_created(db: Session, grade: int) -> None:
+    _bump(db, grade, "pending", 1)
+
+
+def record_deleted(db: Session, grade: int, status: str) -> None:
+    _bump(db, grade, status, -1)
+
+
+def record_grade_changed(db: Session, old_grade: int, new_grade: int, status: str) -> None:
+    if old_grade != new_grade:
+        _bump(db, old_grade, status, -1)
+        _bump(db, new_grade, status, 1)
+
+
+def _record_answer_time(db: Session, bucket: int, count: int, total_seconds: float) -> None:
+    upsert_increment(
+        db,
+        AnswerTimeBucket.__table__,
+        {"bucket": bucket},
+        {"count": count, "total_seconds": total_seconds},
+    )
+
+
+def record_answered(db: Session, grade: int, created_at: datetime, answered_at: datetime) -> None:
+    """A pending suggestion got its first answer (re-answers are not counted)."""
+    record_answered_many(db, [(grade, created_at)], answered_at)
+
+
+def record_answered_many(db: Session, answered: list[tuple[int, datetime]], answered_at: datetime) -> None:
+    """First answers for several pending suggestions, given as (grade, created_at).
+
+    Upserts are grouped per grade and per histogram bucket, so a bulk answer
+    costs a handful of statements rather than three per suggestion.
+    """
+    per_grade: dict[int, int] = {}
+    histogram: dict[int, tuple[int, float]] = {}
+    for grade, created_at in answered:
+        per_grade[grade] = per_grade.get(grade, 0) + 1
+        seconds = _answer_seconds(created_at, answered_at)
+        bucket = _bucket_for(seconds)
+        count, total = histogram.get(bucket, (0, 0.0))
+        histogram[bucket] = (count + 1, total + seconds)
+    for grade, n in per_grade.items():
+        _bump(db, grade, "pending", -n)
+        _bump(db, grade, "answered", n)
+    for bucket, (count, total) in histogram.items():
+        _record_answer_time(db, bucket, count, total)
+
+
+def _percentile(buckets: list[tuple[int, int]], total: int, p: float) -> float | None:
+    if total <= 0:
+        return None
+    rank = p * total
+    seen = 0
+    for bucket, count in buckets:
+        if count <= 0:
+            continue
+        if seen + count >= rank:
+            low, high = _bucket_bounds(bucket)
+            return low + (high - low) * (rank - seen) / count
+        seen += count
+    return _bucket_bounds(buckets[-1][0])[1]
+
+
+def get_stats(db: Session) -> StatsOut:
+    by_grade = {g: GradeCount(grade=g) for g in GRADES}
+    for grade, status, count in db.execute(
+        select(SuggestionCount.grade, SuggestionCount.status, SuggestionCount.count)
+    ):
+        row = by_grade.setdefault(grade, GradeCount(grade=grade))
+        if status in STATUSES:
+            setattr(row, status, count)
+
+    buckets = db.execute(
+        select(AnswerTimeBucket.bucket, AnswerTimeBucket.count, AnswerTimeBucket.total_seconds).order_by(
+            AnswerTimeBucket.bucket
+        )
+    ).all()
+    answered = sum(b.count for b in buckets)
+    total_seconds = sum(b.total_seconds for b in buckets)
+    pairs = [(b.bucket, b.count) for b in buckets]
+
+    grades = [by_grade[g] for g in sorted(by_grade)]
+    pending = sum(g.pending for g in grades)
+    answered_total = sum(g.answered for g in grades)
+    return StatsOut(
+        total=pending + answered_total,
+        pending=pending,
+        answered=answered_total,
+        by_grade=grades,
+        time_to_answer=AnswerTimeStats(
+            count=answered,
+            average_seconds=total_seconds / answered if answered else None,
+            p50_seconds=_percentile(pairs, answered, 0.50),
+            p90_seconds=_percentile(pairs, answered, 0.90),
+            p99_seconds=_percentile(pairs, answered, 0.99),
+        ),
+    )
+
+
+def rebuild_stats(db: Session) -> None:
+    """Recompute every counter from the suggestions tables (migration / drift repair).
+
+    Archived suggestions (app/core/archive.py) are counted too.
+    """
+    db.execute(delete(SuggestionCount))
+    db.execute(delete(AnswerTimeBucket))
+    histogram: dict[int, tuple[int, float]] = {}
+    for model in (Suggestion, SuggestionArchive):
+        counts = db.execute(
+            select(model.grade, model.status, func.count()).group_by(model.grade, model.status)
+        ).all()
+        for grade, status, count in counts:
+            _bump(db, grade, status, count)
+
+        for created_at, answered_at in db.execute(
+            select(model.created_at, model.answered_at).where(
+                model.status == "answered", model.answered_at.isnot(None)
+            )
+        ):
+            seconds = _answer_seconds(created_at, answered_at)
+            bucket = _bucket_for(seconds)
+            count, total = histogram.get(bucket, (0, 0.0))
+            histogram[bucket] = (count + 1, total + seconds)
+    for bucket, (count, total) in histogram.items():
+        _record_answer_time(db, bucket, count, total)
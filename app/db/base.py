@@ -1,5 +1,17 @@
+from sqlalchemy import DateTime
+from sqlalchemy.dialects import sqlite
 from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(DeclarativeBase):
     pass
+
+
+# SQLite's CURRENT_TIMESTAMP stores whole seconds ("YYYY-MM-DD HH:MM:SS") while
+# SQLAlchemy binds datetimes with microseconds, so a value read back from a
+# server_default=func.now() column never compares equal to itself. Columns used
+# in keyset cursors bind in the same format as CURRENT_TIMESTAMP.
+ServerTimestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite",
+)
@@ -0,0 +1,208 @@
+"""Schema migrations.
+
+``python scripts/migrate.py`` brings a database up to ``SCHEMA_VERSION``:
+it creates missing tables, adds columns introduced after a table was first
+created, installs the search index and stamps the version. App startup only
+runs the cheap ``schema_is_current`` check (one SELECT) and migrates when
+AUTO_CREATE_TABLES is enabled and the stamp is behind.
+
+Bump ``SCHEMA_VERSION`` whenever a model, index or search DDL changes.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import Column, Integer, Table, bindparam, delete, func, inspect, insert, select, text, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+import app.models  # noqa: F401  (register every table on Base.metadata)
+from app.core.stats import rebuild_stats
+from app.db.base import Base
+from app.db.search import install_search_index
+from app.models.push import PushOutbox, PushSubscription, endpoint_hash
+from app.models.suggestion import Suggestion, SuggestionArchive
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 7
+
+# Dashboard counters (app/core/stats.py) are backfilled when upgrading past this version.
+_STATS_VERSION = 3
+
+# Single-column indexes superseded by composite ones (left over on older databases).
+_OBSOLETE_INDEXES = {
+    "suggestions": ["ix_suggestions_student_key", "ix_suggestions_grade", "ix_suggestions_status"],
+}
+
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("version", Integer, nullable=False),
+)
+
+
+def _add_missing_columns(engine: Engine) -> None:
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    logger.warning(f"Cannot add NOT NULL column without server default: {table.name}.{column.name}")
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                logger.info(f"Adding column {table.name}.{column.name}")
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {ddl}"))
+
+
+def _create_missing_indexes(engine: Engine) -> None:
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    logger.info(f"Creating index {index.name}")
+                    index.create(bind=conn)
+
+
+def _backfill_push_endpoint_hashes(engine: Engine) -> None:
+    """Hash the endpoints of subscriptions saved before endpoint_hash existed.
+
+    Older versions could store one endpoint several times (a student row and
+    an admin row for the same browser, or repeats). Duplicates are merged
+    into the newest row, keeping every owner, so the unique index can be built.
+    """
+    subs = PushSubscription.__table__
+    existing = {ix["name"] for ix in inspect(engine).get_indexes(subs.name)}
+    if "ux_push_subscriptions_endpoint_hash" in existing:
+        return
+    with engine.begin() as conn:
+        merged: dict[str, dict] = {}
+        stale: list[int] = []
+        rows = conn.execute(
+            select(subs.c.id, subs.c.endpoint, subs.c.student_key, subs.c.admin_id).order_by(subs.c.id)
+        )
+        for row in rows:
+            key = endpoint_hash(row.endpoint)
+            student_key, admin_id = row.student_key, row.admin_id
+            previous = merged.get(key)
+            if previous is not None:
+                stale.append(previous["b_id"])
+                student_key = student_key or previous["b_student_key"]
+                admin_id = admin_id if admin_id is not None else previous["b_admin_id"]
+            merged[key] = {"b_id": row.id, "b_hash": key, "b_student_key": student_key, "b_admin_id": admin_id}
+        if stale:
+            logger.info(f"Merging {len(stale)} duplicate push subscription(s)")
+            conn.execute(delete(PushOutbox).where(PushOutbox.subscription_id.in_(stale)))
+            conn.execute(delete(subs).where(subs.c.id.in_(stale)))
+        if merged:
+            logger.info(f"Hashing {len(merged)} push subscription endpoint(s)")
+            conn.execute(
+                update(subs)
+                .where(subs.c.id == bindparam("b_id"))
+                .values(
+                    endpoint_hash=bindparam("b_hash"),
+                    student_key=bindparam("b_student_key"),
+                    admin_id=bindparam("b_admin_id"),
+                ),
+                list(merged.values()),
+            )
+
+
+def _rebuild_suggestions_autoincrement(engine: Engine) -> None:
+    """SQLite only: recreate ``suggestions`` as AUTOINCREMENT so ids are never reused.
+
+    Rows keep their ids. The FTS triggers go with the old table and are
+    recreated by install_search_index; the FTS rows themselves still match.
+    The id sequence is also moved past every archived id.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    table = Suggestion.__table__
+    with engine.begin() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'suggestions'")).scalar()
+        if ddl is not None and "AUTOINCREMENT" not in ddl.upper():
+            logger.info("Rebuilding suggestions with AUTOINCREMENT")
+            conn.execute(text("ALTER TABLE suggestions RENAME TO suggestions_rebuild"))
+            old_indexes = conn.execute(
+                text(
+                    "SELECT name FROM sqlite_master"
+                    " WHERE type = 'index' AND tbl_name = 'suggestions_rebuild' AND sql IS NOT NULL"
+                )
+            ).scalars()
+            for name in old_indexes.all():
+                conn.execute(text(f"DROP INDEX {name}"))
+            table.create(bind=conn)
+            columns = ", ".join(c.name for c in table.columns)
+            conn.execute(text(f"INSERT INTO suggestions ({columns}) SELECT {columns} FROM suggestions_rebuild"))
+            conn.execute(text("DROP TABLE suggestions_rebuild"))
+            reused = conn.execute(
+                select(func.count()).select_from(Suggestion).where(Suggestion.id.in_(select(SuggestionArchive.id)))
+            ).scalar()
+            if reused:
+                logger.warning(f"{reused} suggestion id(s) were reused after archiving and appear twice")
+
+        archived = conn.execute(select(func.max(SuggestionArchive.id))).scalar()
+        if archived is None:
+            return
+        seq = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'suggestions'")).scalar()
+        if seq is None:
+            conn.execute(
+                text("INSERT INTO sqlite_sequence (name, seq) VALUES ('suggestions', :seq)"), {"seq": archived}
+            )
+        elif seq < archived:
+            conn.execute(text("UPDATE sqlite_sequence SET seq = :seq WHERE name = 'suggestions'"), {"seq": archived})
+
+
+def _drop_obsolete_indexes(engine: Engine) -> None:
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table_name, names in _OBSOLETE_INDEXES.items():
+            if not inspector.has_table(table_name):
+                continue
+            existing = {ix["name"] for ix in inspector.get_indexes(table_name)}
+            for name in names:
+                if name in existing:
+                    logger.info(f"Dropping index {name}")
+                    on_table = f" ON {table_name}" if conn.dialect.name == "mysql" else ""
+                    conn.execute(text(f"DROP INDEX {name}{on_table}"))
+
+
+def current_version(engine: Engine) -> int | None:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(select(schema_version.c.version)).scalar()
+    except DBAPIError:
+        return None
+
+
+def schema_is_current(engine: Engine) -> bool:
+    return current_version(engine) == SCHEMA_VERSION
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """Idempotently migrate the database to SCHEMA_VERSION."""
+    previous = current_version(engine)
+    Base.metadata.create_all(bind=engine)
+    _add_missing_columns(engine)
+    _rebuild_suggestions_autoincrement(engine)
+    _backfill_push_endpoint_hashes(engine)
+    _create_missing_indexes(engine)
+    _drop_obsolete_indexes(engine)
+    with engine.begin() as conn:
+        install_search_index(conn)
+        conn.execute(delete(schema_version))
+        if previous is None or previous < _STATS_VERSION:
+            logger.info("Rebuilding dashboard statistics")
+            with Session(bind=conn) as db:
+                rebuild_stats(db)
+        conn.execute(insert(schema_version).values(version=SCHEMA_VERSION))
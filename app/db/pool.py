@@ -0,0 +1,237 @@
+"""Connection pool selection and statistics.
+
+Modes (``DB_POOL_MODE``):
+- ``queue``: QueuePool sized by ``DB_POOL_SIZE`` / ``DB_MAX_OVERFLOW`` for a
+  long-running server (uvicorn).
+- ``null``: no pooling; every session opens and closes its own connection.
+  Use behind PgBouncer / a provider pooler and on serverless, where a pool
+  would outlive the frozen instance that owns it.
+
+Instead of ``pool_pre_ping`` (a ``SELECT 1`` on every checkout), a pooled
+connection is pinged only when it sat idle for ``DB_PRE_PING_IDLE_SECONDS``.
+A failed ping raises DisconnectionError, which makes the pool drop the
+connection and hand out a fresh one.
+
+Checkout, wait and connect timings are collected in ``pool_stats`` (and
+``async_pool_stats`` for the async engine) so the pools can be sized from
+data (``GET /api/admin/db/pool``).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, Pool, QueuePool
+
+from app.core.config import settings
+
+POOL_MODES = ("queue", "null")
+
+
+class PoolStats:
+    """Process-wide counters; cheap enough to update on every checkout."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_timeouts = 0
+            self.wait_seconds_total = 0.0
+            self.wait_seconds_max = 0.0
+            self.connects = 0
+            self.connect_seconds_total = 0.0
+            self.connect_seconds_max = 0.0
+            self.pings = 0
+            self.ping_failures = 0
+            self.invalidations = 0
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def record_connect(self, elapsed: float) -> None:
+        with self._lock:
+            self.connects += 1
+            self.connect_seconds_total += elapsed
+            self.connect_seconds_max = max(self.connect_seconds_max, elapsed)
+
+    def record_ping(self, ok: bool) -> None:
+        with self._lock:
+            self.pings += 1
+            if not ok:
+                self.ping_failures += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "connects": self.connects,
+                "connect_seconds_total": self.connect_seconds_total,
+                "connect_seconds_max": self.connect_seconds_max,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+                "invalidations": self.invalidations,
+            }
+
+
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+class _InstrumentedPool:
+    """Times checkouts around the public ``Pool.connect()``.
+
+    Connects are timed by the ``do_connect`` / ``checkout`` events
+    (``install_pool_stats``), which leave their duration on the connection
+    record; wait time is checkout time minus that, i.e. the time spent queued
+    for a free connection. SQLAlchemy has no event before a checkout starts,
+    so this is the only part that needs a pool subclass.
+    """
+
+    stats: PoolStats = pool_stats
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.stats.record_timeout()
+            raise
+        elapsed = time.perf_counter() - start
+        connected = conn.info.pop("connect_seconds", 0.0)
+        self.stats.record_checkout(max(0.0, elapsed - connected))
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedNullPool(_InstrumentedPool, NullPool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    stats = async_pool_stats
+
+
+class InstrumentedAsyncNullPool(_InstrumentedPool, NullPool):
+    stats = async_pool_stats
+
+
+def pool_options(database_url: str, is_async: bool = False) -> dict[str, Any]:
+    """Keyword arguments for ``create_engine`` / ``create_async_engine`` according to the pool settings."""
+    mode = settings.DB_POOL_MODE.lower()
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE must be one of {POOL_MODES}, got {settings.DB_POOL_MODE!r}")
+
+    if database_url.startswith("sqlite") and (":memory:" in database_url or database_url.rstrip("/") == "sqlite:"):
+        # 메모리 DB는 연결마다 별도 DB라 SQLAlchemy 기본 풀(SingletonThreadPool)을 그대로 사용
+        return {}
+
+    if mode == "null":
+        return {"poolclass": InstrumentedAsyncNullPool if is_async else InstrumentedNullPool}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
+
+def install_pool_stats(engine: Engine) -> None:
+    """Time new connections (``do_connect`` to first checkout) and count invalidations with pool events.
+
+    For an async engine pass ``async_engine.sync_engine``.
+    """
+    stats = getattr(engine.pool, "stats", pool_stats)
+
+    @event.listens_for(engine, "do_connect")
+    def _before_connect(dialect, connection_record, cargs, cparams):
+        connection_record.info["connect_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkout")
+    def _after_connect(dbapi_connection, connection_record, connection_proxy):
+        # First checkout of a new connection: every "connect" listener
+        # (dialect setup, PRAGMAs) has run by now.
+        started = connection_record.info.pop("connect_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats.record_connect(elapsed)
+        # Subtracted from the wait time of this checkout
+        connection_record.info["connect_seconds"] = connection_record.info.get("connect_seconds", 0.0) + elapsed
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        stats.record_invalidation()
+
+
+def install_idle_ping(engine: Engine, idle_seconds: float) -> None:
+    """Ping connections on checkout only if they were idle for ``idle_seconds``.
+
+    A negative value disables pinging; 0 pings on every checkout. For an
+    async engine pass ``async_engine.sync_engine``.
+    """
+    stats = getattr(engine.pool, "stats", pool_stats)
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+    if idle_seconds < 0:
+        return
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_in_at = connection_record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < idle_seconds:
+            return  # fresh connection, or used moments ago
+        try:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            finally:
+                cursor.close()
+        except Exception as e:
+            stats.record_ping(ok=False)
+            raise exc.DisconnectionError(f"idle connection failed ping: {e}") from e
+        stats.record_ping(ok=True)
+
+
+def pool_status(engine: Engine) -> dict[str, Any]:
+    """Current pool occupancy plus the cumulative counters."""
+    pool: Pool = engine.pool
+    status: dict[str, Any] = {"mode": settings.DB_POOL_MODE.lower(), "pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    status.update(getattr(pool, "stats", pool_stats).snapshot())
+    return status
@@ -0,0 +1,118 @@
+"""SQL statement counting: per-request budget and query-count assertions.
+
+Engine events in ``app/db/session.py`` call ``record`` for every statement.
+It is added to:
+- the current request's ``QueryTally`` (a ContextVar set by
+  ``MetricsMiddleware``); a request over ``DB_QUERY_BUDGET`` statements or
+  ``DB_QUERY_TIME_BUDGET_SECONDS`` is logged with its statements, and a
+  statement repeated ``DB_REPEATED_QUERY_THRESHOLD`` times is logged as a
+  likely N+1;
+- every open ``count_queries()`` block, process-wide, so tests and
+  ``scripts/check_query_budget.py`` can count what a TestClient call ran
+  (the app runs in another thread there).
+
+    with assert_max_queries(3, "GET /api/me/suggestions"):
+        client.get("/api/me/suggestions", headers=...)
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Distinct statements listed in a budget report; the totals cover all of them.
+MAX_LISTED_STATEMENTS = 50
+
+
+@dataclass
+class QueryTally:
+    """Statements executed within one request (or one ``count_queries`` block)."""
+
+    queries: int = 0
+    seconds: float = 0.0
+    # statement text -> [executions, seconds], in first-seen order
+    statements: dict[str, list] = field(default_factory=dict)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        self.queries += 1
+        self.seconds += elapsed
+        entry = self.statements.setdefault(statement, [0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def most_repeated(self) -> tuple[str, int] | None:
+        if not self.statements:
+            return None
+        statement, (count, _) = max(self.statements.items(), key=lambda item: item[1][0])
+        return statement, count
+
+    def describe(self) -> str:
+        lines = [f"{self.queries} statement(s), {self.seconds * 1000:.1f} ms"]
+        for statement, (count, seconds) in list(self.statements.items())[:MAX_LISTED_STATEMENTS]:
+            lines.append(f"  x{count:<3d} {seconds * 1000:7.2f} ms  {' '.join(statement.split())[:300]}")
+        if len(self.statements) > MAX_LISTED_STATEMENTS:
+            lines.append(f"  ... {len(self.statements) - MAX_LISTED_STATEMENTS} more distinct statement(s)")
+        return "\n".join(lines)
+
+
+# Set by MetricsMiddleware; threadpool handlers see the same object (copied context).
+current_tally: ContextVar[QueryTally | None] = ContextVar("current_tally", default=None)
+
+_observers: list[QueryTally] = []
+_observers_lock = threading.Lock()
+
+
+def record(statement: str, elapsed: float) -> None:
+    tally = current_tally.get()
+    if tally is not None:
+        tally.record(statement, elapsed)
+    if _observers:
+        with _observers_lock:
+            for observer in _observers:
+                observer.record(statement, elapsed)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryTally]:
+    """Count every statement the process runs while the block is open (any thread)."""
+    tally = QueryTally()
+    with _observers_lock:
+        _observers.append(tally)
+    try:
+        yield tally
+    finally:
+        with _observers_lock:
+            _observers.remove(tally)
+
+
+@contextmanager
+def assert_max_queries(limit: int, label: str = "block") -> Iterator[QueryTally]:
+    """Fail with the list of statements when the block runs more than ``limit``."""
+    with count_queries() as tally:
+        yield tally
+    if tally.queries > limit:
+        raise AssertionError(f"{label} ran {tally.queries} queries, budget is {limit}:\n{tally.describe()}")
+
+
+def check_budget(tally: QueryTally, label: str) -> None:
+    """Log the request if it went over the query budget or repeated a statement."""
+    over_count = 0 < settings.DB_QUERY_BUDGET < tally.queries
+    over_time = 0 < settings.DB_QUERY_TIME_BUDGET_SECONDS < tally.seconds
+    if over_count or over_time:
+        logger.warning(
+            f"Query budget exceeded by {label} "
+            f"(budget {settings.DB_QUERY_BUDGET} / {settings.DB_QUERY_TIME_BUDGET_SECONDS}s): {tally.describe()}"
+        )
+        return
+    repeated = tally.most_repeated()
+    if repeated and 0 < settings.DB_REPEATED_QUERY_THRESHOLD <= repeated[1]:
+        statement, count = repeated
+        logger.warning(f"Possible N+1 in {label}: statement ran {count} times: {' '.join(statement.split())[:300]}")
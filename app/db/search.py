@@ -0,0 +1,164 @@
+"""Indexed substring search over suggestion title/content.
+
+Backends, picked per database:
+- SQLite: FTS5 external-content table ``suggestions_fts`` with the trigram
+  tokenizer, kept in sync with ``suggestions`` by triggers. Ranked by bm25.
+- PostgreSQL: ``pg_trgm`` GIN indexes on title and content, which Postgres
+  keeps in sync itself. ``ILIKE '%q%'`` uses them; ranked by word_similarity.
+  Korean text needs a UTF-8 database locale so pg_trgm treats Hangul as
+  word characters.
+- Anything else (or when the index could not be installed): plain ILIKE.
+  ``suggestions_archive`` is always searched with ILIKE and left unranked
+  (only when an admin asks for the archive); on PostgreSQL the same trigram
+  indexes exist on it, on SQLite it has no search index.
+
+Trigram indexes work on any script, which is what makes Korean substrings
+("급식실") searchable without a morphological analyser. Queries shorter than
+three characters have no trigram and fall back to ILIKE.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import Integer, column, func, literal, literal_column, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Query, Session
+
+from app.models.suggestion import Suggestion
+
+logger = logging.getLogger(__name__)
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS suggestions_fts USING fts5(
+        title, content, content='suggestions', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS suggestions_fts_ai AFTER INSERT ON suggestions BEGIN
+        INSERT INTO suggestions_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS suggestions_fts_ad AFTER DELETE ON suggestions BEGIN
+        INSERT INTO suggestions_fts(suggestions_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS suggestions_fts_au AFTER UPDATE OF title, content ON suggestions BEGIN
+        INSERT INTO suggestions_fts(suggestions_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO suggestions_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_suggestions_title_trgm ON suggestions USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_suggestions_content_trgm ON suggestions USING gin (content gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_suggestions_archive_title_trgm ON suggestions_archive USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_suggestions_archive_content_trgm ON suggestions_archive USING gin (content gin_trgm_ops)",
+]
+
+MIN_INDEXED_QUERY_LENGTH = 3
+
+suggestions_fts = table("suggestions_fts", column("rowid", Integer))
+
+_backend: str | None = None
+
+
+def install_search_index(conn: Connection) -> None:
+    """Create the search index for this database if it is missing (idempotent).
+
+    On failure only the index DDL is rolled back (the caller's transaction
+    stays usable) and searches fall back to ILIKE.
+    """
+    global _backend
+    dialect = conn.dialect.name
+    try:
+        if dialect == "sqlite":
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'suggestions_fts'")
+            ).first()
+            for ddl in _SQLITE_DDL:
+                conn.execute(text(ddl))
+            if not exists:
+                # Index rows that were written before the FTS table existed.
+                conn.execute(text("INSERT INTO suggestions_fts(suggestions_fts) VALUES ('rebuild')"))
+        elif dialect == "postgresql":
+            # SAVEPOINT: a failed statement (e.g. no privilege for CREATE
+            # EXTENSION) would otherwise abort the caller's whole transaction.
+            with conn.begin_nested():
+                for ddl in _POSTGRES_DDL:
+                    conn.execute(text(ddl))
+    except DBAPIError as e:
+        logger.warning(f"Search index not installed, falling back to ILIKE: {e}")
+        _backend = "like"
+        return
+    _backend = None  # re-detect on next search
+
+
+def _detect_backend(db: Session) -> str:
+    global _backend
+    if _backend is None:
+        dialect = db.get_bind().dialect.name
+        backend = "like"
+        if dialect == "sqlite":
+            if db.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'suggestions_fts'")
+            ).first():
+                backend = "fts5"
+        elif dialect == "postgresql":
+            if db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first():
+                backend = "pg_trgm"
+        _backend = backend
+    return _backend
+
+
+def _ilike(query: Query, q: str, model: type = Suggestion) -> Query:
+    like = f"%{q}%"
+    return query.filter((model.title.ilike(like)) | (model.content.ilike(like)))
+
+
+def apply_search(db: Session, query: Query, q: str, model: type = Suggestion) -> tuple[Query, list | None]:
+    """Filter ``query`` (over ``model``: Suggestion or SuggestionArchive) to suggestions matching ``q``.
+
+    Returns the filtered query and the ORDER BY clauses that rank it (best
+    match first, newest first among equals), or None when the backend cannot
+    rank and the caller's default order applies.
+    """
+    q = q.strip()
+    recency = [Suggestion.created_at.desc(), Suggestion.id.desc()]
+    if model is not Suggestion:
+        return _ilike(query, q, model), None
+    backend = _detect_backend(db)
+
+    if len(q) < MIN_INDEXED_QUERY_LENGTH or backend == "like":
+        return _ilike(query, q), None
+
+    if backend == "fts5":
+        # One phrase = contiguous substring match, same semantics as ILIKE '%q%'.
+        phrase = '"' + q.replace('"', '""') + '"'
+        fts = literal_column("suggestions_fts")
+        matches = (
+            select(
+                suggestions_fts.c.rowid.label("id"),
+                # Title hits weigh more than content hits; lower bm25 is better.
+                func.bm25(fts, 2.0, 1.0).label("score"),
+            )
+            .where(fts.op("MATCH")(phrase))
+            .subquery()
+        )
+        query = query.join(matches, matches.c.id == Suggestion.id)
+        return query, [matches.c.score.asc(), *recency]
+
+    # pg_trgm: the ILIKE predicates are answered from the GIN trigram indexes.
+    score = func.greatest(
+        func.word_similarity(literal(q), Suggestion.title) * 2,
+        func.word_similarity(literal(q), Suggestion.content),
+    )
+    return _ilike(query, q), [score.desc(), *recency]
@@ -2,13 +2,26 @@
 
 from __future__ import annotations
 
+import logging
 import ssl
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Union
 from urllib.parse import urlparse, urlencode, parse_qs, urlunparse
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Result, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import Executable
 
+from app.core import metrics
 from app.core.config import settings
+from app.db import querycount
+from app.db.pool import install_idle_ping, install_pool_stats, pool_options
+
+logger = logging.getLogger(__name__)
 
 
 # Database URL processing for Vercel
@@ -37,11 +50,43 @@ elif database_url.startswith("postgresql"):
     ssl_context.verify_mode = ssl.CERT_NONE
     connect_args = {"ssl_context": ssl_context}
 
+# 풀 모드/크기는 DB_POOL_* 설정, pre-ping은 유휴 시간이 지난 연결에만 실행 (app/db/pool.py)
 engine = create_engine(
     database_url,
     connect_args=connect_args,
-    pool_pre_ping=True,
+    **pool_options(database_url),
 )
+install_pool_stats(engine)
+install_idle_ping(engine, settings.DB_PRE_PING_IDLE_SECONDS)
+
+
+def install_query_tracking(engine, label: str) -> None:
+    """Time every statement for the request's query tally / budget (app/db/querycount.py) and the metrics."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("query_started")
+        if not started:
+            return
+        elapsed = time.perf_counter() - started.pop()
+        querycount.record(statement, elapsed)
+        if settings.METRICS_ENABLED:
+            metrics.db_queries.inc(engine=label)
+            metrics.db_query_duration.observe(elapsed, engine=label)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # after_cursor_execute does not fire for a failed statement
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+install_query_tracking(engine, "sync")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -51,4 +96,91 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# ---------------------------------------------------------------------------
+# Async engine (DB_ASYNC): read-heavy public routes await the database on the
+# event loop instead of holding a threadpool worker per request.
+# ---------------------------------------------------------------------------
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def _async_engine_args(url: str) -> tuple[str, dict[str, Any]] | None:
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return None
+    async_connect_args: dict[str, Any] = {}
+    if driver == "sqlite+aiosqlite":
+        async_connect_args = {"check_same_thread": False}
+    elif driver == "postgresql+asyncpg":
+        async_connect_args = {"ssl": connect_args["ssl_context"]}
+        if settings.DB_POOL_MODE.lower() == "null":
+            # PgBouncer(transaction 모드)는 연결 간 prepared statement 공유가 안 됨
+            async_connect_args["statement_cache_size"] = 0
+            parsed = parsed.update_query_dict({"prepared_statement_cache_size": "0"})
+    return parsed.set(drivername=driver).render_as_string(hide_password=False), async_connect_args
+
+
+def _create_async_engine() -> AsyncEngine | None:
+    if not settings.DB_ASYNC:
+        return None
+    args = _async_engine_args(database_url)
+    if args is None:
+        logger.warning(f"DB_ASYNC: no async driver for {make_url(database_url).drivername}, using the sync engine")
+        return None
+    url, async_connect_args = args
+    try:
+        async_engine = create_async_engine(url, connect_args=async_connect_args, **pool_options(url, is_async=True))
+    except ImportError as e:
+        logger.warning(f"DB_ASYNC: async driver not installed ({e}), using the sync engine")
+        return None
+    install_pool_stats(async_engine.sync_engine)
+    install_idle_ping(async_engine.sync_engine, settings.DB_PRE_PING_IDLE_SECONDS)
+    install_query_tracking(async_engine.sync_engine, "async")
+    return async_engine
+
+
+async_engine = _create_async_engine()
+
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine is not None else None
+)
+
+AnySession = Union[AsyncSession, Session]
+
+
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AnySession]:
+    """AsyncSession when the async engine is available, otherwise a sync Session.
+
+    Code using it runs its statements through ``execute`` so the same handler
+    works on both paths (DB_ASYNC=false keeps the old threadpool behaviour,
+    one worker thread per statement).
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def get_async_db() -> AsyncIterator[AnySession]:
+    async with async_session_scope() as db:
+        yield db
+
+
+async def execute(db: AnySession, statement: Executable) -> Result:
+    if isinstance(db, AsyncSession):
+        return await db.execute(statement)
+    return await run_in_threadpool(db.execute, statement)
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""Dialect-specific INSERT ... ON CONFLICT helpers (SQLite, PostgreSQL, MySQL)."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import Table, func
+from sqlalchemy.orm import Session
+
+
+def dialect_insert(dialect: str, table: Table):
+    """``insert(table)`` from the dialect module, which has the upsert clauses."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+    else:
+        raise NotImplementedError(f"No upsert support for {dialect}")
+    return insert(table)
+
+
+def upsert_increment(db: Session, table: Table, keys: dict[str, Any], increments: dict[str, Any]) -> None:
+    """Add ``increments`` to the row identified by ``keys``, creating it if missing.
+
+    One statement, atomic under concurrent writers (``col = col + delta`` on conflict).
+    """
+    dialect = db.get_bind().dialect.name
+    stmt = dialect_insert(dialect, table).values(**keys, **increments)
+    if dialect == "mysql":
+        stmt = stmt.on_duplicate_key_update({c: table.c[c] + stmt.inserted[c] for c in increments})
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={c: table.c[c] + stmt.excluded[c] for c in increments},
+        )
+    db.execute(stmt)
+
+
+def upsert_returning_id(
+    db: Session,
+    table: Table,
+    index_elements: list[str],
+    values: dict[str, Any],
+    update_columns: list[str],
+) -> int:
+    """Insert ``values``, or update ``update_columns`` of the row with the same ``index_elements``.
+
+    One statement; returns the id of the inserted or updated row.
+    """
+    dialect = db.get_bind().dialect.name
+    stmt = dialect_insert(dialect, table).values(**values)
+    if dialect == "mysql":
+        # LAST_INSERT_ID(id) makes lastrowid report the existing row on update
+        stmt = stmt.on_duplicate_key_update(
+            {"id": func.last_insert_id(table.c.id), **{c: stmt.inserted[c] for c in update_columns}}
+        )
+        return db.execute(stmt).lastrowid
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={c: stmt.excluded[c] for c in update_columns},
+    ).returning(table.c.id)
+    return db.execute(stmt).scalar_one()
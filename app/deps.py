@@ -2,12 +2,18 @@
 
 from __future__ import annotations
 
-from fastapi import Depends, Header, HTTPException
+from dataclasses import dataclass
+from datetime import datetime
+
+from fastapi import Depends, Header, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError
 from sqlalchemy.orm import Session
 
-from app.core.security import decode_token
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.ratelimit import MemoryTokenBuckets, get_token_buckets, parse_rate_limit
+from app.core.security import TokenError, decode_token
 from app.db.session import get_db
 from app.models.admin import Admin
 
@@ -15,16 +21,110 @@ from app.models.admin import Admin
 bearer_scheme = HTTPBearer(auto_error=False)
 
 
-def require_student_key(x_student_key: str | None = Header(default=None, alias="X-Student-Key")) -> str:
-    if not x_student_key or len(x_student_key) < 10:
+def client_ip(request: Request) -> str:
+    if settings.TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def _check_student_key(student_key: str | None) -> str:
+    if not student_key or len(student_key) < 10:
         raise HTTPException(status_code=400, detail="Missing X-Student-Key")
-    return x_student_key
+    return student_key
+
+
+# async: no I/O here, so FastAPI runs it inline instead of on a threadpool worker
+async def require_student_key(x_student_key: str | None = Header(default=None, alias="X-Student-Key")) -> str:
+    return _check_student_key(x_student_key)
+
+
+async def require_student_key_param(
+    x_student_key: str | None = Header(default=None, alias="X-Student-Key"),
+    student_key: str | None = Query(default=None, max_length=64),
+) -> str:
+    """Like require_student_key, but also accepts ?student_key= (EventSource cannot set headers)."""
+    return _check_student_key(x_student_key or student_key)
+
+
+def rate_limit(scope: str, per_student: str, per_ip: str):
+    """Dependency throttling a write route per X-Student-Key and per client IP (token buckets).
+
+    Declare it before the handler's other dependencies: an over-limit request
+    gets a 429 with Retry-After from one bucket lookup, before any DB work.
+    """
+    student_limit = parse_rate_limit(per_student)
+    ip_limit = parse_rate_limit(per_ip)
+
+    async def check(
+        request: Request,
+        x_student_key: str | None = Header(default=None, alias="X-Student-Key"),
+    ) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        limits = {}
+        if student_limit and x_student_key:
+            limits[f"{scope}:student:{x_student_key[:128]}"] = student_limit
+        if ip_limit:
+            limits[f"{scope}:ip:{client_ip(request)}"] = ip_limit
+        if not limits:
+            return
+
+        buckets = get_token_buckets()
+        if isinstance(buckets, MemoryTokenBuckets):
+            wait = buckets.take(limits)
+        else:
+            wait = await run_in_threadpool(buckets.take, limits)
+        if wait is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests",
+                headers={"Retry-After": str(int(wait) + 1)},
+            )
+
+    return check
+
+
+@dataclass(frozen=True)
+class AdminIdentity:
+    """Authenticated admin, detached from any DB session (safe to cache).
+
+    Only fields that change together with token_version belong here; anything
+    else (e.g. last_login_at) would be served stale from the cache.
+    """
+
+    id: int
+    username: str
+    token_version: int
+    created_at: datetime
+
+
+# (username, iat) -> identity. Cache hits are not re-checked against the DB:
+# revoke_admin_tokens only clears the calling process's cache, so a token revoked
+# from another process (e.g. create_admin.py --reset-password) keeps working in
+# running workers for up to ADMIN_CACHE_TTL_SECONDS.
+_admin_cache: TTLCache[tuple[str, int | None], AdminIdentity] = TTLCache(
+    maxsize=settings.ADMIN_CACHE_SIZE,
+    ttl=settings.ADMIN_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_admin_cache(username: str) -> None:
+    _admin_cache.discard_where(lambda key, _: key[0] == username)
+
+
+def revoke_admin_tokens(db: Session, admin: Admin) -> None:
+    """Invalidate every token issued to ``admin`` so far (call before commit)."""
+    admin.token_version += 1
+    db.add(admin)
+    invalidate_admin_cache(admin.username)
 
 
 def get_current_admin(
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
     db: Session = Depends(get_db),
-) -> Admin:
+) -> AdminIdentity:
     if credentials is None or credentials.scheme.lower() != "bearer":
         raise HTTPException(status_code=401, detail="Not authenticated")
 
@@ -32,14 +132,26 @@ def get_current_admin(
     try:
         payload = decode_token(token)
         username = payload.get("sub")
-    except JWTError:
+    except TokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    cache_key = (username, payload.get("iat"))
+    cached = _admin_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     admin = db.query(Admin).filter(Admin.username == username).first()
-    if not admin:
+    if not admin or payload.get("ver", 0) != admin.token_version:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    return admin
+    identity = AdminIdentity(
+        id=admin.id,
+        username=admin.username,
+        token_version=admin.token_version,
+        created_at=admin.created_at,
+    )
+    _admin_cache.set(cache_key, identity)
+    return identity
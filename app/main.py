@@ -7,27 +7,42 @@ This app is designed to work in two environments:
 
 from __future__ import annotations
 
+import logging
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse
 
 from app.core.config import settings
-from app.db.base import Base
+from app.core.fastjson import FastJSONResponse, fast_json_enabled
+from app.core.metrics import MetricsMiddleware
+from app.core.push import OutboxWorker
+from app.core.static import StaticManifest
+from app.db.migrate import schema_is_current, upgrade_schema
 from app.db.session import engine
 from app.routers.admin import router as admin_router
+from app.routers.metrics import router as metrics_router
 from app.routers.public import router as public_router
 from app.routers.push import router as push_router
 
 
+logger = logging.getLogger(__name__)
+
+
 def _parse_origins(raw: str) -> list[str]:
     items = [x.strip() for x in (raw or "").split(",")]
     return [x for x in items if x]
 
 
-app = FastAPI(title="School Suggestions", version="1.0.0")
+if settings.FAST_JSON and not fast_json_enabled():
+    logger.warning("FAST_JSON is set but orjson is not installed; using the default JSON encoder")
+
+app = FastAPI(
+    title="School Suggestions",
+    version="1.0.0",
+    default_response_class=FastJSONResponse if fast_json_enabled() else JSONResponse,
+)
 
 origins = _parse_origins(settings.CORS_ORIGINS)
 if origins:
@@ -37,34 +52,53 @@ if origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Lets the frontend read ETag for If-None-Match revalidation.
+        expose_headers=["ETag"],
     )
 
+# Outermost, so the latency covers CORS handling as well; also applies the SQL query budget
+app.add_middleware(MetricsMiddleware)
+
+
+outbox_worker = OutboxWorker(interval=settings.PUSH_WORKER_INTERVAL_SECONDS)
+
 
 @app.on_event("startup")
 def on_startup():
-    if settings.AUTO_CREATE_TABLES:
-        Base.metadata.create_all(bind=engine)
+    # One SELECT on the schema_version table; schema DDL only runs when it is behind.
+    if not schema_is_current(engine):
+        if settings.AUTO_CREATE_TABLES:
+            upgrade_schema(engine)
+        else:
+            logger.warning("Database schema is out of date; run `python scripts/migrate.py`")
+    if settings.PUSH_WORKER_ENABLED:
+        outbox_worker.start()
+    if PUBLIC_DIR.exists():
+        static_manifest.build()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    outbox_worker.stop()
 
 
 # API 라우트를 먼저 등록 ( catch-all 보다 앞에 있어야 함)
 app.include_router(public_router)
 app.include_router(admin_router)
 app.include_router(push_router)
+app.include_router(metrics_router)
 
 
-# 정적 파일 서빙 (로컬 개발용)
+# 정적 파일 서빙 (로컬 개발용): public/ 을 시작 시 메모리에 올려 두고 경로로만 조회 (app/core/static.py)
 PUBLIC_DIR = Path(__file__).parent.parent / "public"
-if PUBLIC_DIR.exists():
-    app.mount("/assets", StaticFiles(directory=str(PUBLIC_DIR / "assets")), name="assets")
+static_manifest = StaticManifest(PUBLIC_DIR)
 
 
 @app.get("/{full_path:path}")
-async def serve_spa(full_path: str):
-    """SPA 라우팅을 위해 모든 경로를 index.html로 처리"""
-    # 정적 파일이 있으면 반환
-    file_path = PUBLIC_DIR / full_path
-    if full_path and file_path.exists() and file_path.is_file():
-        return FileResponse(file_path)
-    
-    # 否则返回 index.html 用于 SPA 路由
-    return FileResponse(PUBLIC_DIR / "index.html")
+async def serve_spa(
+    full_path: str,
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    accept_encoding: str | None = Header(default=None, alias="Accept-Encoding"),
+):
+    """SPA 라우팅을 위해 없는 경로는 index.html로 처리, 없는 파일(assets/*, 확장자 있는 경로)은 404 (메모리 조회만 하므로 async)"""
+    return static_manifest.response(full_path, if_none_match, accept_encoding)
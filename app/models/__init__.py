@@ -1,5 +1,6 @@
 from app.models.admin import Admin
-from app.models.push import PushSubscription
-from app.models.suggestion import Suggestion
+from app.models.push import PushOutbox, PushSubscription
+from app.models.stats import AnswerTimeBucket, SuggestionCount
+from app.models.suggestion import Suggestion, SuggestionArchive
 
-__all__ = ["Admin", "Suggestion", "PushSubscription"]
+__all__ = ["Admin", "Suggestion", "SuggestionArchive", "PushSubscription", "PushOutbox", "SuggestionCount", "AnswerTimeBucket"]
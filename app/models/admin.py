@@ -14,6 +14,8 @@ class Admin(Base):
     Notes:
     - Passwords are stored as bcrypt hashes.
     - JWT authentication is handled in the API layer.
+    - token_version is embedded in issued JWTs ("ver"); bumping it revokes
+      every token issued before (password reset, account removal).
     """
 
     __tablename__ = "admins"
@@ -21,6 +23,7 @@ class Admin(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     username: Mapped[str] = mapped_column(String(64), unique=True, index=True, nullable=False)
     password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     last_login_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
@@ -1,27 +1,68 @@
 from __future__ import annotations
 
+import hashlib
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Integer, String, Text, func
+from sqlalchemy import Boolean, DateTime, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
 
 
+def endpoint_hash(endpoint: str) -> str:
+    """Fixed-size key for a push endpoint URL (the URL itself is unbounded TEXT)."""
+    return hashlib.sha256(endpoint.encode("utf-8")).hexdigest()
+
+
 class PushSubscription(Base):
-    """Push notification subscription for students or admins."""
+    """Push notification subscription: one row per browser (push endpoint).
+
+    A student or admin may have several devices. A browser used both on the
+    student pages and the admin page is one row with both owners set.
+    """
 
     __tablename__ = "push_subscriptions"
+    # Subscribing is an upsert on the endpoint hash (app/routers/push.py)
+    __table_args__ = (Index("ux_push_subscriptions_endpoint_hash", "endpoint_hash", unique=True),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     
-    # Either student_key or admin_id should be set
+    # student_key and/or admin_id is set
     student_key: Mapped[str | None] = mapped_column(String(64), index=True, nullable=True)
     admin_id: Mapped[int | None] = mapped_column(Integer, index=True, nullable=True)
     
     # Push subscription data
+    # server_default only lets the migration add the column; it backfills the hashes
+    endpoint_hash: Mapped[str] = mapped_column(String(64), nullable=False, server_default="")
     endpoint: Mapped[str] = mapped_column(Text, nullable=False)
     p256dh: Mapped[str] = mapped_column(String(256), nullable=False)
     auth: Mapped[str] = mapped_column(String(128), nullable=False)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class PushOutbox(Base):
+    """Pending push delivery: one row per (subscription, message).
+
+    Rows are written in the same transaction as the change that triggers the
+    notification and drained by the push worker (see app/core/push.py).
+    """
+
+    __tablename__ = "push_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    subscription_id: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+
+    title: Mapped[str] = mapped_column(String(200), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # Rows sharing a collapse_key are merged per subscription while they wait
+    # for their window to elapse; batch_count is the number of merged events.
+    collapse_key: Mapped[str | None] = mapped_column(String(64), index=True, nullable=True)
+    batch_count: Mapped[int] = mapped_column(Integer, default=1, server_default="1", nullable=False)
+
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True, nullable=False)
+    last_error: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
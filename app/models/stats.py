@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from sqlalchemy import Float, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class SuggestionCount(Base):
+    """Number of suggestions per (grade, status).
+
+    Maintained in the same transaction as every create/delete/grade change/
+    answer (see app/core/stats.py), so the dashboard never counts rows.
+    """
+
+    __tablename__ = "suggestion_counts"
+
+    grade: Mapped[int] = mapped_column(Integer, primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class AnswerTimeBucket(Base):
+    """Histogram of time-to-answer (log-scaled buckets, see app/core/stats.py)."""
+
+    __tablename__ = "answer_time_buckets"
+
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_seconds: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
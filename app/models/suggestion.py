@@ -2,27 +2,19 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, Text, func
+from sqlalchemy import DateTime, Index, Integer, String, Text, func, literal_column
 from sqlalchemy.orm import Mapped, mapped_column
 
-from app.db.base import Base
+from app.db.base import Base, ServerTimestamp
 
 
-class Suggestion(Base):
-    """Student suggestion.
-
-    student_key is a random UUID stored in the browser (localStorage) to identify
-    "my suggestions" without requiring a full student login system.
-    """
-
-    __tablename__ = "suggestions"
-
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+class SuggestionColumns:
+    """Columns shared by the hot ``suggestions`` table and ``suggestions_archive``."""
 
     # Client-generated anonymous identifier (UUID string)
-    student_key: Mapped[str] = mapped_column(String(64), index=True, nullable=False)
+    student_key: Mapped[str] = mapped_column(String(64), nullable=False)
 
-    grade: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
+    grade: Mapped[int] = mapped_column(Integer, nullable=False)
     title: Mapped[str] = mapped_column(String(140), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
 
@@ -30,17 +22,71 @@ class Suggestion(Base):
     status: Mapped[str] = mapped_column(
         String(20),
         default="pending",
-        index=True,
         nullable=False,
     )
 
     answer: Mapped[str | None] = mapped_column(Text, nullable=True)
     answered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(ServerTimestamp, server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
         onupdate=func.now(),
         nullable=False,
     )
+    # Bumped by every UPDATE (ORM or bulk), unlike updated_at which only has
+    # second resolution on SQLite. List ETags hash the (id, version) pairs.
+    version: Mapped[int] = mapped_column(
+        Integer,
+        default=1,
+        server_default="1",
+        onupdate=literal_column("version + 1"),
+        nullable=False,
+    )
+
+
+class Suggestion(SuggestionColumns, Base):
+    """Student suggestion.
+
+    student_key is a random UUID stored in the browser (localStorage) to identify
+    "my suggestions" without requiring a full student login system.
+    """
+
+    __tablename__ = "suggestions"
+    # Composite indexes matched to the query shapes (see scripts/check_query_plans.py):
+    # - 내 건의: student_key = ? ORDER BY created_at / student_key = ? AND answered_at > ?
+    # - 관리자 목록: [status =] [grade =] ORDER BY created_at DESC, id DESC (keyset)
+    # - 보관 작업: status = 'answered' AND answered_at < ? ORDER BY answered_at
+    # AUTOINCREMENT: SQLite would otherwise hand out max(id) + 1 again after the
+    # newest row is deleted, colliding with ids already in suggestions_archive.
+    __table_args__ = (
+        Index("ix_suggestions_student_created", "student_key", "created_at"),
+        Index("ix_suggestions_student_answered", "student_key", "answered_at"),
+        Index("ix_suggestions_status_grade_created", "status", "grade", "created_at", "id"),
+        Index("ix_suggestions_grade_created", "grade", "created_at", "id"),
+        Index("ix_suggestions_created", "created_at", "id"),
+        Index("ix_suggestions_status_answered", "status", "answered_at", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+
+class SuggestionArchive(SuggestionColumns, Base):
+    """Answered suggestion moved out of the hot table (app/core/archive.py).
+
+    Keeps the original id. Rows here are read-only: students see them merged
+    into their list, admins only with ``include_archive``.
+    """
+
+    __tablename__ = "suggestions_archive"
+    # Every row is answered, so no status index
+    __table_args__ = (
+        Index("ix_suggestions_archive_student_created", "student_key", "created_at"),
+        Index("ix_suggestions_archive_grade_created", "grade", "created_at", "id"),
+        Index("ix_suggestions_archive_created", "created_at", "id"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
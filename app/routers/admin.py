@@ -1,223 +1,442 @@
 from __future__ import annotations
 
 import base64
-import json
 import logging
-import time
 from datetime import datetime, timezone
-from typing import Any, Dict
+from typing import Callable
 
-import jwt
-import requests
-from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives import serialization
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, case, or_, select, union_all, update
 from sqlalchemy.orm import Session
 
+from app.core.archive import suggestion_columns
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password
-from app.db.session import get_db
-from app.deps import get_current_admin
+from app.core.etag import etag_matches, not_modified, set_etag, weak_etag
+from app.core.export import csv_chunks, ndjson_chunks
+from app.core.fastjson import FastJSONResponse, fast_json_enabled, suggestion_dicts
+from app.core.notify import answer_hub
+from app.core.push import drain_outbox, enqueue_student_answer, enqueue_student_answers
+from app.core.ratelimit import FailureLimiter
+from app.core.security import PasswordHasherBusy, create_access_token, verify_password_offloaded
+from app.core.stats import get_stats, record_answered, record_answered_many
+from app.db.pool import pool_status
+from app.db.search import apply_search
+from app.db.session import async_engine, engine, get_db
+from app.deps import AdminIdentity, client_ip, get_current_admin
 from app.models.admin import Admin
-from app.models.push import PushSubscription
-from app.models.suggestion import Suggestion
+from app.models.suggestion import Suggestion, SuggestionArchive
 from app.schemas.admin import AdminLoginIn, AdminOut, TokenOut
-from app.schemas.suggestion import SuggestionAnswerIn, SuggestionOut
+from app.schemas.stats import StatsOut
+from app.schemas.suggestion import (
+    SuggestionAnswerIn,
+    SuggestionBulkAnswerIn,
+    SuggestionBulkAnswerOut,
+    SuggestionOut,
+    SuggestionPage,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
+login_limiter = FailureLimiter(window=settings.LOGIN_FAILURE_WINDOW_SECONDS)
 
-def _load_vapid_private_key():
-    """
-    Load VAPID private key from settings.
+# Answers are compare-and-set on Suggestion.version; retries when a student
+# edit (or another admin) lands between the read and the UPDATE.
+_ANSWER_ATTEMPTS = 3
 
-    지원 포맷:
-    - EC PEM 문자열 (-----BEGIN ... 로 시작)
-    - URL-safe base64 (web-push, node-web-push 가 출력하는 43/44자짜리 키)
-    """
-    raw = settings.VAPID_PRIVATE_KEY.strip()
-    if not raw:
-        raise RuntimeError("VAPID_PRIVATE_KEY is not configured")
-
-    # 1) PEM 포맷인 경우 그대로 파싱
-    if raw.startswith("-----BEGIN"):
-        return serialization.load_pem_private_key(raw.encode("utf-8"), password=None)
-
-    # 2) URL-safe base64 → 32바이트 시드 → EC 프라이빗 키로 변환
-    key_b64 = raw.replace("-", "+").replace("_", "/")
-    padding = 4 - len(key_b64) % 4
-    if padding != 4:
-        key_b64 += "=" * padding
-    seed = base64.b64decode(key_b64)
-
-    if len(seed) != 32:
-        # SECP256R1 에 맞는 32바이트 키가 아니면 명확히 에러를 던진다
-        raise ValueError("VAPID private key must be 32 bytes when given as base64")
-
-    # RFC8292 (VAPID) 는 P-256(SECP256R1)을 사용
-    return ec.derive_private_key(int.from_bytes(seed, "big"), ec.SECP256R1())
-
-
-def _create_vapid_jwt(endpoint: str) -> tuple[str, str]:
-    """Create VAPID JWT for push authentication."""
-    # cryptography EC 키 객체로 생성 (PEM / base64 모두 지원)
-    private_key = _load_vapid_private_key()
-
-    # Get audience from endpoint (scheme://host)
-    # endpoint: https://fcm.googleapis.com/fcm/send/xxx
-    # aud: https://fcm.googleapis.com
-    from urllib.parse import urlparse
-    parsed = urlparse(endpoint)
-    aud = f"{parsed.scheme}://{parsed.netloc}"
-
-    # Create JWT (12시간 유효)
-    now = int(time.time())
-    payload = {
-        "aud": aud,
-        "exp": now + 12 * 3600,
-        "sub": "mailto:admin@school.local",
-    }
-
-    token = jwt.encode(payload, private_key, algorithm="ES256")
-    return token, settings.VAPID_PUBLIC_KEY
-
-
-def send_push_notification_to_subscription(sub: PushSubscription, title: str, body: str) -> bool:
-    """Send a single push notification to a subscription."""
-    if not settings.VAPID_PRIVATE_KEY or not settings.VAPID_PUBLIC_KEY:
-        logger.warning("VAPID keys not configured, skipping push")
-        return False
-    
+
+def _encode_cursor(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> str:
     try:
-        # Create VAPID JWT
-        vapid_token, vapid_key = _create_vapid_jwt(sub.endpoint)
-        
-        # Prepare push message
-        message = json.dumps({
-            "title": title,
-            "body": body,
-            "icon": "/assets/icon.png",
-            "tag": f"suggestion-{sub.id}"
-        })
-        
-        # Send push
-        response = requests.post(
-            sub.endpoint,
-            data=message,
-            headers={
-                "Content-Type": "application/json",
-                "TTL": "86400",
-                "Authorization": f"vapid t={vapid_token}, k={vapid_key}"
-            },
-            timeout=10
-        )
-        
-        if response.status_code in (200, 201, 202):
-            logger.info(f"Push sent to {sub.endpoint[:50]}...")
-            return True
-        else:
-            logger.warning(f"Push failed: {response.status_code} - {response.text[:100]}")
-            return False
-            
-    except Exception as e:
-        logger.error(f"Push error: {e}")
-        return False
-
-
-def send_push_notifications(student_key: str, suggestion_title: str):
-    """Send push notifications to all subscriptions for a student."""
-    if not settings.VAPID_PRIVATE_KEY or not settings.VAPID_PUBLIC_KEY:
-        logger.warning("VAPID keys not configured, skipping push")
-        return
-    
-    subscriptions = None
+        return base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _keyset_cursor(created_at: datetime, suggestion_id: int) -> str:
+    return _encode_cursor(f"k|{created_at.isoformat()}|{suggestion_id}")
+
+
+def _parse_keyset_cursor(cursor: str) -> tuple[datetime, int]:
     try:
-        from app.db.session import SessionLocal
-        db = SessionLocal()
-        try:
-            subscriptions = db.query(PushSubscription).filter(
-                PushSubscription.student_key == student_key
-            ).all()
-        finally:
-            db.close()
-    except Exception as e:
-        logger.error(f"Failed to get subscriptions: {e}")
-        return
-    
-    if not subscriptions:
-        logger.warning("No subscriptions found")
-        return
-    
-    for sub in subscriptions:
-        send_push_notification_to_subscription(
-            sub,
-            "새 답변이 도착했어요",
-            suggestion_title
-        )
+        kind, created_at, suggestion_id = _decode_cursor(cursor).split("|")
+        if kind != "k":
+            raise ValueError(kind)
+        return datetime.fromisoformat(created_at), int(suggestion_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _offset_cursor(offset: int) -> str:
+    return _encode_cursor(f"o|{offset}")
+
+
+def _parse_offset_cursor(cursor: str) -> int:
+    try:
+        kind, offset = _decode_cursor(cursor).split("|")
+        if kind != "o":
+            raise ValueError(kind)
+        return max(0, int(offset))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router.post("/login", response_model=TokenOut)
-def admin_login(body: AdminLoginIn, db: Session = Depends(get_db)):
-    admin = db.query(Admin).filter(Admin.username == body.username).first()
-    if not admin or not verify_password(body.password, admin.password_hash):
+async def admin_login(body: AdminLoginIn, request: Request, db: Session = Depends(get_db)):
+    ip_key = f"ip:{client_ip(request)}"
+    user_key = f"user:{body.username.lower()}"
+
+    # Reject known-bad sources before doing any bcrypt work.
+    retry_after = login_limiter.retry_after({
+        ip_key: settings.LOGIN_MAX_FAILURES_PER_IP,
+        user_key: settings.LOGIN_MAX_FAILURES_PER_USERNAME,
+    })
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(int(retry_after) + 1)},
+        )
+
+    admin = await run_in_threadpool(lambda: db.query(Admin).filter(Admin.username == body.username).first())
+    if not admin:
+        login_limiter.record_failure(ip_key, user_key)
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    admin.last_login_at = datetime.now(timezone.utc)
-    db.add(admin)
-    db.commit()
+    try:
+        valid, new_hash = await verify_password_offloaded(body.password, admin.password_hash)
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=429, detail="Login is busy, try again shortly", headers={"Retry-After": "1"})
+    if not valid:
+        login_limiter.record_failure(ip_key, user_key)
+        raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    token = create_access_token(subject=admin.username)
+    login_limiter.reset(user_key)
+    token = create_access_token(subject=admin.username, extra={"ver": admin.token_version})
+
+    def _record_login() -> None:
+        admin.last_login_at = datetime.now(timezone.utc)
+        if new_hash:
+            # Stored hash used an outdated bcrypt cost: upgrade it transparently.
+            admin.password_hash = new_hash
+        db.add(admin)
+        db.commit()
+
+    await run_in_threadpool(_record_login)
     return TokenOut(access_token=token)
 
 
 @router.get("/me", response_model=AdminOut)
-def admin_me(current_admin: Admin = Depends(get_current_admin)):
-    return current_admin
+def admin_me(
+    db: Session = Depends(get_db),
+    current_admin: AdminIdentity = Depends(get_current_admin),
+):
+    # last_login_at is not part of the cached identity: read it fresh.
+    admin = db.get(Admin, current_admin.id)
+    if admin is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return admin
 
 
-@router.get("/suggestions", response_model=list[SuggestionOut])
+@router.get("/db/pool")
+def admin_db_pool(current_admin: AdminIdentity = Depends(get_current_admin)):
+    """Connection pool occupancy and cumulative checkout/wait/connect stats."""
+    status = pool_status(engine)
+    if async_engine is not None:
+        status["async"] = pool_status(async_engine.sync_engine)
+    return status
+
+
+@router.get("/stats", response_model=StatsOut)
+def admin_stats(
+    db: Session = Depends(get_db),
+    _: AdminIdentity = Depends(get_current_admin),
+):
+    """Counts by grade/status and time-to-answer, read from the counter tables."""
+    return get_stats(db)
+
+
+def _filtered(db: Session, model: type, grade: int | None, status: str | None, q: str | None):
+    """Admin list filters over Suggestion or SuggestionArchive; returns (query, ranking)."""
+    query = db.query(model)
+    if grade is not None:
+        query = query.filter(model.grade == grade)
+    if status in {"pending", "answered"}:
+        query = query.filter(model.status == status)
+
+    ranking = None
+    if q and q.strip():
+        query, ranking = apply_search(db, query, q, model)
+    return query, ranking
+
+
+def _after_cursor(model: type, cursor: str):
+    after_created_at, after_id = _parse_keyset_cursor(cursor)
+    return or_(
+        model.created_at < after_created_at,
+        and_(model.created_at == after_created_at, model.id < after_id),
+    )
+
+
+@router.get("/suggestions", response_model=SuggestionPage)
 def admin_list_suggestions(
+    response: Response,
     grade: int | None = Query(default=None, ge=1, le=3),
     status: str | None = Query(default=None),
     q: str | None = Query(default=None, max_length=80),
+    cursor: str | None = Query(default=None, max_length=200),
+    limit: int = Query(default=50, ge=1, le=200),
+    include_archive: bool = Query(default=False),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
     db: Session = Depends(get_db),
-    _: Admin = Depends(get_current_admin),
+    _: AdminIdentity = Depends(get_current_admin),
 ):
-    query = db.query(Suggestion)
-    if grade is not None:
-        query = query.filter(Suggestion.grade == grade)
-    if status in {"pending", "answered"}:
-        query = query.filter(Suggestion.status == status)
-    if q:
-        like = f"%{q.strip()}%"
-        query = query.filter((Suggestion.title.ilike(like)) | (Suggestion.content.ilike(like)))
-    return query.order_by(Suggestion.created_at.desc()).all()
+    """Newest first, keyset-paginated on (created_at, id).
+
+    Every page is an index range scan from the cursor position, so deep pages
+    cost the same as the first one. Searches (``q``) go through the search
+    index and come back ranked by relevance; those pages use an offset cursor
+    because the whole match set is scored anyway.
+
+    Only the hot table is read unless ``include_archive`` is set; then both
+    tables are merged newest first (searches included: relevance scores do
+    not span the two tables) and the archive is searched without an index.
+
+    Responses carry a weak ETag over the (id, version) of the page's rows.
+    With If-None-Match the page query first runs for just those columns, and
+    a match returns 304 without loading or encoding the rows.
+    """
+    query, ranking = _filtered(db, Suggestion, grade, status, q)
+    sides = [(query, Suggestion)]
+    if include_archive:
+        sides.append((_filtered(db, SuggestionArchive, grade, status, q)[0], SuggestionArchive))
+        ranking = None
+
+    offset = 0
+    if ranking is not None:
+        offset = _parse_offset_cursor(cursor) if cursor else 0
+    elif cursor:
+        sides = [(side.filter(_after_cursor(model, cursor)), model) for side, model in sides]
+
+    def fetch(columns: Callable[[type], list] | None) -> list:
+        """The page's limit + 1 rows: ``columns(model)`` tuples, or ORM objects when None."""
+        if ranking is not None:
+            ranked = query if columns is None else query.with_entities(*columns(Suggestion))
+            return ranked.order_by(*ranking).offset(offset).limit(limit + 1).all()
+        if include_archive:
+            # Top limit + 1 of each table, merged: both sides stay index range scans.
+            tops = [
+                side.with_entities(*columns(model))
+                .order_by(model.created_at.desc(), model.id.desc())
+                .limit(limit + 1)
+                .subquery()
+                for side, model in sides
+            ]
+            merged = union_all(*(select(*top.c) for top in tops)).subquery()
+            return db.execute(
+                select(*merged.c).order_by(merged.c.created_at.desc(), merged.c.id.desc()).limit(limit + 1)
+            ).all()
+        hot = sides[0][0] if columns is None else sides[0][0].with_entities(*columns(Suggestion))
+        return hot.order_by(Suggestion.created_at.desc(), Suggestion.id.desc()).limit(limit + 1).all()
+
+    def etag_of(rows) -> str:
+        # Every UPDATE bumps version; inserts, deletes and archiving show in the ids
+        pairs = [(row.id, row.version) for row in rows]
+        return weak_etag("admin", grade, status, q, cursor, limit, include_archive, pairs)
+
+    if if_none_match:
+        etag = etag_of(fetch(lambda model: [model.id, model.created_at, model.version]))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    fast = fast_json_enabled()
+    # Plain column rows instead of ORM objects for the fast path (app/core/fastjson.py)
+    # and for the merge, which needs the same columns from both tables.
+    rows = fetch(
+        (lambda model: [*suggestion_columns(model), model.version]) if fast or include_archive else None
+    )
+    etag = etag_of(rows)
+    set_etag(response, etag)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        if ranking is not None:
+            next_cursor = _offset_cursor(offset + limit)
+        else:
+            next_cursor = _keyset_cursor(rows[-1].created_at, rows[-1].id)
+
+    if not fast:
+        return SuggestionPage(items=rows, next_cursor=next_cursor)
+    out = FastJSONResponse({"items": suggestion_dicts(rows), "next_cursor": next_cursor})
+    set_etag(out, etag)
+    return out
+
+
+@router.get("/suggestions/export")
+def admin_export_suggestions(
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    grade: int | None = Query(default=None, ge=1, le=3),
+    status: str | None = Query(default=None),
+    q: str | None = Query(default=None, max_length=80),
+    include_archive: bool = Query(default=False),
+    db: Session = Depends(get_db),
+    _: AdminIdentity = Depends(get_current_admin),
+):
+    """Every matching suggestion, newest first, streamed as CSV or NDJSON.
+
+    Same filters as the list (searches come back newest first, not ranked).
+    Rows are streamed from a server-side cursor (app/core/export.py).
+    """
+    models = [Suggestion, SuggestionArchive] if include_archive else [Suggestion]
+    selects = [
+        _filtered(db, model, grade, status, q)[0].with_entities(*suggestion_columns(model)).statement
+        for model in models
+    ]
+    if include_archive:
+        merged = union_all(*selects).subquery()
+        statement = select(*merged.c).order_by(merged.c.created_at.desc(), merged.c.id.desc())
+    else:
+        statement = selects[0].order_by(Suggestion.created_at.desc(), Suggestion.id.desc())
+
+    filename = f"suggestions-{datetime.now():%Y%m%d-%H%M}.{format}"
+    if format == "csv":
+        chunks, media_type = csv_chunks(statement), "text/csv; charset=utf-8"
+    else:
+        chunks, media_type = ndjson_chunks(statement), "application/x-ndjson"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
 
 
 @router.patch("/suggestions/{suggestion_id}/answer", response_model=SuggestionOut)
 def admin_answer_suggestion(
     suggestion_id: int,
     body: SuggestionAnswerIn,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    _: Admin = Depends(get_current_admin),
+    _: AdminIdentity = Depends(get_current_admin),
 ):
-    s = db.query(Suggestion).filter(Suggestion.id == suggestion_id).first()
-    if not s:
-        raise HTTPException(status_code=404, detail="Suggestion not found")
+    answer = body.answer.strip()
+    for attempt in range(_ANSWER_ATTEMPTS):
+        s = db.execute(
+            select(
+                Suggestion.student_key,
+                Suggestion.grade,
+                Suggestion.title,
+                Suggestion.status,
+                Suggestion.created_at,
+                Suggestion.version,
+            ).where(Suggestion.id == suggestion_id)
+        ).first()
+        if not s:
+            raise HTTPException(status_code=404, detail="Suggestion not found")
+        answered_at = datetime.now(timezone.utc)
+        # Compare-and-set on version: the counters below use the status and
+        # grade just read, so only count when nothing changed in between.
+        result = db.execute(
+            update(Suggestion)
+            .where(Suggestion.id == suggestion_id, Suggestion.version == s.version)
+            .values(answer=answer, status="answered", answered_at=answered_at)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            break
+        db.rollback()
+    else:
+        raise HTTPException(status_code=409, detail="Suggestion is being changed, try again")
+
+    newly_answered = s.status == "pending"
+    # Queue push notification and count the answer if it is new (same transaction)
+    if newly_answered:
+        record_answered(db, s.grade, s.created_at, answered_at)
+        enqueue_student_answer(db, s.student_key, s.title)
+    out = SuggestionOut.model_validate(db.get(Suggestion, suggestion_id))
+    db.commit()
+
+    answer_hub.publish(s.student_key)
+    if newly_answered:
+        background_tasks.add_task(drain_outbox)
 
-    old_status = s.status
-    s.answer = body.answer.strip()
-    s.status = "answered"
-    s.answered_at = datetime.now(timezone.utc)
+    return out
 
-    db.add(s)
+
+@router.patch("/suggestions/answers", response_model=SuggestionBulkAnswerOut)
+def admin_bulk_answer_suggestions(
+    body: SuggestionBulkAnswerIn,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    _: AdminIdentity = Depends(get_current_admin),
+):
+    """Answer many suggestions in one transaction.
+
+    One SELECT for the current state, one set-based UPDATE (per-id answers
+    via CASE, applied only if no row changed since the SELECT), grouped
+    stats upserts and a single outbox INSERT that sends each student one
+    push however many of their suggestions were answered.
+    Already answered suggestions get the new text without another push.
+    """
+    answers = body.answers()
+    for attempt in range(_ANSWER_ATTEMPTS):
+        rows = db.execute(
+            select(
+                Suggestion.id,
+                Suggestion.student_key,
+                Suggestion.grade,
+                Suggestion.title,
+                Suggestion.status,
+                Suggestion.created_at,
+                Suggestion.version,
+            )
+            .where(Suggestion.id.in_(list(answers)))
+            .with_for_update()
+        ).all()
+        found = [r.id for r in rows]
+        if not rows:
+            break
+        now = datetime.now(timezone.utc)
+        texts = {answers[i] for i in found}
+        answer = texts.pop() if len(texts) == 1 else case({i: answers[i] for i in found}, value=Suggestion.id)
+        # Compare-and-set on every row's version (see admin_answer_suggestion)
+        result = db.execute(
+            update(Suggestion)
+            .where(
+                Suggestion.id.in_(found),
+                Suggestion.version == case({r.id: r.version for r in rows}, value=Suggestion.id),
+            )
+            .values(answer=answer, status="answered", answered_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == len(rows):
+            break
+        db.rollback()
+    else:
+        raise HTTPException(status_code=409, detail="Suggestions are being changed, try again")
+
+    newly_answered = [r for r in rows if r.status == "pending"]
+    if newly_answered:
+        record_answered_many(db, [(r.grade, r.created_at) for r in newly_answered], now)
+        titles_by_student: dict[str, list[str]] = {}
+        for r in newly_answered:
+            titles_by_student.setdefault(r.student_key, []).append(r.title)
+        enqueue_student_answers(db, titles_by_student)
     db.commit()
-    db.refresh(s)
-    
-    # Send push notification if this is a new answer
-    if old_status != "answered":
-        send_push_notifications(s.student_key, s.title)
-    
-    return s
+
+    for student_key in {r.student_key for r in rows}:
+        answer_hub.publish(student_key)
+    if newly_answered:
+        background_tasks.add_task(drain_outbox)
+
+    order = {suggestion_id: n for n, suggestion_id in enumerate(answers)}
+    items = db.query(Suggestion).filter(Suggestion.id.in_(found)).all() if found else []
+    items.sort(key=lambda s: order[s.id])
+    found_ids = set(found)
+    return SuggestionBulkAnswerOut(items=items, missing=[i for i in answers if i not in found_ids])
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.pool import pool_status
+from app.db.session import async_engine, engine, get_db
+from app.deps import bearer_scheme, get_current_admin
+
+router = APIRouter(prefix="/api", tags=["metrics"])
+
+_POOL_GAUGES = {
+    "size": "Configured pool size.",
+    "checked_in": "Idle connections in the pool.",
+    "checked_out": "Connections currently in use.",
+    "overflow": "Connections opened beyond the pool size.",
+}
+_POOL_COUNTERS = {
+    "checkouts": "Connection checkouts.",
+    "checkout_timeouts": "Checkouts that timed out waiting for a connection.",
+    "wait_seconds_total": "Time spent waiting for a free connection.",
+    "connects": "New database connections opened.",
+    "connect_seconds_total": "Time spent opening connections.",
+    "pings": "Idle-connection pings.",
+    "ping_failures": "Idle-connection pings that failed.",
+    "invalidations": "Connections invalidated (dropped) by the pool.",
+}
+
+
+def _pool_metrics() -> list[str]:
+    engines = {"sync": pool_status(engine)}
+    if async_engine is not None:
+        engines["async"] = pool_status(async_engine.sync_engine)
+
+    lines: list[str] = []
+    for key, help in _POOL_GAUGES.items():
+        samples = [({"engine": name}, status[key]) for name, status in engines.items() if key in status]
+        if samples:
+            lines += metrics.format_family(f"db_pool_{key}", "gauge", help, samples)
+    for key, help in _POOL_COUNTERS.items():
+        name = f"db_pool_{key}" if key.endswith("_total") else f"db_pool_{key}_total"
+        lines += metrics.format_family(name, "counter", help, [({"engine": n}, s[key]) for n, s in engines.items()])
+    return lines
+
+
+metrics.register_collector(_pool_metrics)
+
+
+def _allowed_ips() -> set[str]:
+    return {ip.strip() for ip in settings.METRICS_ALLOWED_IPS.split(",") if ip.strip()}
+
+
+def require_metrics_access(
+    request: Request,
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+) -> None:
+    # Connection address, not X-Forwarded-For: the allow-list is for scrapers that reach the app directly.
+    if request.client and request.client.host in _allowed_ips():
+        return
+    if (
+        settings.METRICS_TOKEN
+        and credentials is not None
+        and hmac.compare_digest(credentials.credentials.encode(), settings.METRICS_TOKEN.encode())
+    ):
+        return
+    get_current_admin(credentials, db)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics(_: None = Depends(require_metrics_access)):
+    """Prometheus text exposition of the request, database, pool and push metrics."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
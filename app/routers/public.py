@@ -1,29 +1,45 @@
 from __future__ import annotations
 
-from datetime import datetime
+import asyncio
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select, update
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.deps import require_student_key
-from app.models.push import PushSubscription
+from app.core.archive import hot_and_archive, suggestion_columns
+from app.core.config import settings
+from app.core.etag import etag_matches, not_modified, set_etag, weak_etag
+from app.core.fastjson import FastJSONResponse, fast_json_enabled, suggestion_dicts
+from app.core.notify import answer_hub
+from app.core.push import drain_outbox, enqueue_admin_new_suggestion, schedule_admin_batch_drain
+from app.core.stats import record_created, record_deleted, record_grade_changed
+from app.db.session import AnySession, async_session_scope, execute, get_async_db, get_db
+from app.deps import rate_limit, require_student_key, require_student_key_param
 from app.models.suggestion import Suggestion
-from app.routers.admin import send_push_notification_to_subscription
 from app.schemas.suggestion import SuggestionCreateIn, SuggestionOut, SuggestionUpdateIn
 
 
 router = APIRouter(prefix="/api", tags=["public"])
 
 
+# Every new suggestion also fans out a push to the admins
+suggestion_rate_limit = rate_limit(
+    "suggestion", settings.RATE_LIMIT_SUGGESTION_PER_STUDENT, settings.RATE_LIMIT_SUGGESTION_PER_IP
+)
+
+
 @router.get("/health")
-def health():
+async def health():
     return {"ok": True}
 
 
 @router.post("/suggestions", response_model=SuggestionOut)
 def create_suggestion(
     body: SuggestionCreateIn,
+    background_tasks: BackgroundTasks,
+    _: None = Depends(suggestion_rate_limit),
     student_key: str = Depends(require_student_key),
     db: Session = Depends(get_db),
 ):
@@ -35,37 +51,170 @@ def create_suggestion(
         status="pending",
     )
     db.add(s)
+    record_created(db, s.grade)
+    # Notify all admins (queued in the same transaction, sent after the response)
+    enqueue_admin_new_suggestion(db, s.title)
+    # INSERT ... RETURNING fills id/created_at/updated_at: build the response
+    # before commit expires them, instead of a db.refresh() round trip after it
+    db.flush()
+    out = SuggestionOut.model_validate(s)
     db.commit()
-    db.refresh(s)
-    
-    # Notify all admins
-    try:
-        admin_subs = db.query(PushSubscription).filter(
-            PushSubscription.admin_id.isnot(None)
-        ).all()
-        
-        for sub in admin_subs:
-            send_push_notification_to_subscription(
-                sub, 
-                f"새 건의 등록: {body.title[:30]}...",
-                "학생이 새로운 건의사항을 등록했습니다."
-            )
-    except Exception as e:
-        print(f"Failed to notify admins: {e}")
-    
-    return s
+
+    background_tasks.add_task(drain_outbox)
+    schedule_admin_batch_drain()
+
+    return out
 
 
 @router.get("/me/suggestions", response_model=list[SuggestionOut])
-def list_my_suggestions(
+async def list_my_suggestions(
+    response: Response,
     student_key: str = Depends(require_student_key),
     since_answered_at: datetime | None = Query(default=None),
-    db: Session = Depends(get_db),
+    if_none_match: str | None = Header(default=None, alias="If-None-Match"),
+    db: AnySession = Depends(get_async_db),
+):
+    """Newest first, answered suggestions moved to the archive included.
+
+    Weak ETag over the (id, version) of the listed rows; with If-None-Match
+    only those two columns are read first, and a match returns 304.
+    """
+
+    def criteria(model) -> list:
+        where = [model.student_key == student_key]
+        if since_answered_at is not None:
+            where += [model.answered_at.isnot(None), model.answered_at > since_answered_at]
+        return where
+
+    def etag_of(rows) -> str:
+        # Every UPDATE bumps version; inserts, deletes and archiving show in the ids
+        return weak_etag("me", student_key, since_answered_at, sorted((row.id, row.version) for row in rows))
+
+    if if_none_match:
+        keys = hot_and_archive(criteria, lambda model: [model.id, model.version])
+        etag = etag_of(await execute(db, select(*keys.c)))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+    merged = hot_and_archive(criteria, lambda model: [*suggestion_columns(model), model.version])
+    rows = (await execute(db, select(*merged.c).order_by(merged.c.created_at.desc()))).all()
+    etag = etag_of(rows)
+    set_etag(response, etag)
+    if fast_json_enabled():
+        fast = FastJSONResponse(suggestion_dicts(rows))
+        set_etag(fast, etag)
+        return fast
+    return rows
+
+
+async def _answered_since(student_key: str, since: datetime) -> list[SuggestionOut]:
+    """Answers newer than ``since``, oldest first (short-lived session: callers may wait for minutes)."""
+    async with async_session_scope() as db:
+        rows = await execute(
+            db,
+            select(Suggestion)
+            .where(Suggestion.student_key == student_key)
+            .where(Suggestion.answered_at.isnot(None))
+            .where(Suggestion.answered_at > since)
+            .order_by(Suggestion.answered_at),
+        )
+        return [SuggestionOut.model_validate(s) for s in rows.scalars()]
+
+
+@router.get("/me/suggestions/wait", response_model=list[SuggestionOut])
+async def wait_my_answers(
+    student_key: str = Depends(require_student_key),
+    since_answered_at: datetime | None = Query(default=None),
+    timeout: float | None = Query(default=None, gt=0),
+):
+    """Long-poll: return as soon as a suggestion is answered after ``since_answered_at``.
+
+    Returns an empty list when nothing happened within the wait timeout
+    (capped by LONGPOLL_TIMEOUT_SECONDS); the client simply asks again.
+    """
+    since = since_answered_at or datetime.now(timezone.utc)
+    wait = min(timeout or settings.LONGPOLL_TIMEOUT_SECONDS, settings.LONGPOLL_TIMEOUT_SECONDS)
+
+    # Listen before the first check so an answer committed in between is not missed.
+    with answer_hub.listen(student_key) as answered:
+        items = await _answered_since(student_key, since)
+        if items:
+            return items
+        try:
+            await asyncio.wait_for(answered.wait(), wait)
+        except asyncio.TimeoutError:
+            pass
+    return await _answered_since(student_key, since)
+
+
+@router.get("/me/suggestions/stream")
+async def stream_my_answers(
+    request: Request,
+    student_key: str = Depends(require_student_key_param),
+    since_answered_at: datetime | None = Query(default=None),
+    last_event_id: str | None = Header(default=None, alias="Last-Event-ID"),
 ):
-    q = db.query(Suggestion).filter(Suggestion.student_key == student_key)
-    if since_answered_at is not None:
-        q = q.filter(Suggestion.answered_at.isnot(None)).filter(Suggestion.answered_at > since_answered_at)
-    return q.order_by(Suggestion.created_at.desc()).all()
+    """Server-Sent Events: one ``answer`` event per newly answered suggestion.
+
+    The event id is the answer timestamp, so a reconnecting EventSource resumes
+    from where it stopped. Streams close after SSE_MAX_SECONDS and the browser
+    reconnects on its own.
+    """
+    if not settings.SSE_ENABLED:
+        raise HTTPException(status_code=404, detail="Streaming is disabled")
+
+    since = since_answered_at or datetime.now(timezone.utc)
+    if last_event_id:
+        try:
+            since = datetime.fromisoformat(last_event_id)
+        except ValueError:
+            pass
+
+    async def events():
+        nonlocal since
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.SSE_MAX_SECONDS
+        with answer_hub.listen(student_key) as answered:
+            yield "retry: 3000\n\n"
+            while loop.time() < deadline:
+                answered.clear()
+                for item in await _answered_since(student_key, since):
+                    since = item.answered_at
+                    yield f"id: {since.isoformat()}\nevent: answer\ndata: {item.model_dump_json()}\n\n"
+                try:
+                    await asyncio.wait_for(answered.wait(), settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Heartbeat; the next loop also re-checks the DB for answers
+                    # published by other instances.
+                    yield ": ping\n\n"
+                if await request.is_disconnected():
+                    break
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+_CHANGED_DETAIL = "Suggestion was answered or changed meanwhile, reload and try again"
+
+
+def _load_own(db: Session, suggestion_id: int, student_key: str):
+    s = db.execute(
+        select(Suggestion.grade, Suggestion.status, Suggestion.version).where(
+            Suggestion.id == suggestion_id, Suggestion.student_key == student_key
+        )
+    ).first()
+    if not s:
+        raise HTTPException(status_code=404, detail="Suggestion not found")
+    return s
+
+
+def _unchanged_pending(suggestion_id: int, version: int) -> list:
+    # Still pending and untouched since it was read, so the counter update
+    # below (old grade, status pending) matches what is actually changed.
+    return [Suggestion.id == suggestion_id, Suggestion.status == "pending", Suggestion.version == version]
 
 
 @router.patch("/me/suggestions/{suggestion_id}", response_model=SuggestionOut)
@@ -75,24 +224,33 @@ def update_my_suggestion(
     student_key: str = Depends(require_student_key),
     db: Session = Depends(get_db),
 ):
-    s = db.query(Suggestion).filter(Suggestion.id == suggestion_id, Suggestion.student_key == student_key).first()
-    if not s:
-        raise HTTPException(status_code=404, detail="Suggestion not found")
-
+    s = _load_own(db, suggestion_id, student_key)
     if s.status != "pending":
         raise HTTPException(status_code=409, detail="Answered suggestions cannot be edited")
 
+    values = {}
     if body.grade is not None:
-        s.grade = body.grade
+        values["grade"] = body.grade
     if body.title is not None:
-        s.title = body.title.strip()
+        values["title"] = body.title.strip()
     if body.content is not None:
-        s.content = body.content.strip()
+        values["content"] = body.content.strip()
 
-    db.add(s)
+    if values:
+        result = db.execute(
+            update(Suggestion)
+            .where(*_unchanged_pending(suggestion_id, s.version))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            db.rollback()
+            raise HTTPException(status_code=409, detail=_CHANGED_DETAIL)
+        if body.grade is not None:
+            record_grade_changed(db, s.grade, body.grade, "pending")
+    out = SuggestionOut.model_validate(db.get(Suggestion, suggestion_id))
     db.commit()
-    db.refresh(s)
-    return s
+    return out
 
 
 @router.delete("/me/suggestions/{suggestion_id}")
@@ -101,12 +259,18 @@ def delete_my_suggestion(
     student_key: str = Depends(require_student_key),
     db: Session = Depends(get_db),
 ):
-    s = db.query(Suggestion).filter(Suggestion.id == suggestion_id, Suggestion.student_key == student_key).first()
-    if not s:
-        raise HTTPException(status_code=404, detail="Suggestion not found")
+    s = _load_own(db, suggestion_id, student_key)
     if s.status != "pending":
         raise HTTPException(status_code=409, detail="Answered suggestions cannot be deleted")
 
-    db.delete(s)
+    result = db.execute(
+        delete(Suggestion)
+        .where(*_unchanged_pending(suggestion_id, s.version))
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=_CHANGED_DETAIL)
+    record_deleted(db, s.grade, "pending")
     db.commit()
     return {"ok": True}
@@ -1,71 +1,76 @@
 from __future__ import annotations
 
-import base64
-import json
 import logging
-from typing import Any
 
-import requests
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import delete, update
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
 from app.db.session import get_db
-from app.deps import get_current_admin, require_student_key
-from app.models.admin import Admin
-from app.models.push import PushSubscription
+from app.db.upsert import upsert_returning_id
+from app.deps import AdminIdentity, get_current_admin, rate_limit, require_student_key
+from app.models.push import PushSubscription, endpoint_hash
 from app.schemas.push import PushSubscriptionIn, PushSubscriptionOut
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/push", tags=["push"])
 
+subscribe_rate_limit = rate_limit(
+    "subscribe", settings.RATE_LIMIT_SUBSCRIBE_PER_STUDENT, settings.RATE_LIMIT_SUBSCRIBE_PER_IP
+)
+
+
+def _upsert_subscription(db: Session, body: PushSubscriptionIn, owner: dict) -> int:
+    """One statement: a new device is inserted, a known one gets fresh keys and ``owner`` added."""
+    return upsert_returning_id(
+        db,
+        PushSubscription.__table__,
+        ["endpoint_hash"],
+        {
+            "endpoint_hash": endpoint_hash(body.endpoint),
+            "endpoint": body.endpoint,
+            "p256dh": body.p256dh,
+            "auth": body.auth,
+            **owner,
+        },
+        ["p256dh", "auth", *owner],
+    )
+
 
 @router.post("/subscribe", response_model=PushSubscriptionOut)
-async def subscribe(
-    request: Request,
+def subscribe(
     body: PushSubscriptionIn,
+    _: None = Depends(subscribe_rate_limit),
     student_key: str = Depends(require_student_key),
     db: Session = Depends(get_db),
 ):
-    """Save push subscription for a student."""
-    logger.info(f"收到订阅请求: {body}")
-    logger.info(f"student_key: {student_key}")
-    
+    """Save push subscription for a student (one per device)."""
     try:
-        # Remove old subscriptions for this student
-        deleted = db.query(PushSubscription).filter(
-            PushSubscription.student_key == student_key
-        ).delete()
-        logger.info(f"删除了 {deleted} 个旧订阅")
-        
-        # Add new subscription
-        sub = PushSubscription(
-            student_key=student_key,
-            endpoint=body.endpoint,
-            p256dh=body.p256dh,
-            auth=body.auth,
-        )
-        db.add(sub)
+        sub_id = _upsert_subscription(db, body, {"student_key": student_key})
         db.commit()
-        db.refresh(sub)
-        logger.info(f"订阅保存成功: id={sub.id}")
-        return sub
+        logger.info(f"Push subscription saved: id={sub_id}")
+        return PushSubscriptionOut(id=sub_id, student_key=student_key, endpoint=body.endpoint)
     except Exception as e:
-        logger.error(f"订阅保存失败: {e}")
+        logger.error(f"Push subscription failed: {e}")
         db.rollback()
         raise
 
 
 @router.delete("/unsubscribe")
 def unsubscribe(
+    endpoint: str | None = Query(default=None, max_length=2048),
     student_key: str = Depends(require_student_key),
     db: Session = Depends(get_db),
 ):
-    """Remove push subscription for a student."""
-    db.query(PushSubscription).filter(
-        PushSubscription.student_key == student_key
-    ).delete()
+    """Remove the student's subscription for ``endpoint`` (this device), or all of them."""
+    mine = [PushSubscription.student_key == student_key]
+    if endpoint is not None:
+        mine.append(PushSubscription.endpoint_hash == endpoint_hash(endpoint))
+    # A device also subscribed on the admin page keeps its row for admin pushes
+    db.execute(update(PushSubscription).where(*mine, PushSubscription.admin_id.isnot(None)).values(student_key=None))
+    db.execute(delete(PushSubscription).where(*mine))
     db.commit()
     return {"ok": True}
 
@@ -74,30 +79,16 @@ def unsubscribe(
 def admin_subscribe(
     body: PushSubscriptionIn,
     db: Session = Depends(get_db),
-    admin: Admin = Depends(get_current_admin),
+    admin: AdminIdentity = Depends(get_current_admin),
 ):
-    """Save push subscription for an admin."""
+    """Save push subscription for an admin (one per device)."""
     logger.info(f"Admin subscription request: {admin.username}")
     
     try:
-        # Remove old subscriptions for this admin
-        db.query(PushSubscription).filter(
-            PushSubscription.admin_id == admin.id
-        ).delete()
-        
-        # Add new subscription
-        sub = PushSubscription(
-            admin_id=admin.id,
-            student_key=None,
-            endpoint=body.endpoint,
-            p256dh=body.p256dh,
-            auth=body.auth,
-        )
-        db.add(sub)
+        sub_id = _upsert_subscription(db, body, {"admin_id": admin.id})
         db.commit()
-        db.refresh(sub)
-        logger.info(f"Admin subscription saved: id={sub.id}")
-        return {"ok": True, "id": sub.id}
+        logger.info(f"Admin subscription saved: id={sub_id}")
+        return {"ok": True, "id": sub_id}
     except Exception as e:
         logger.error(f"Admin subscription failed: {e}")
         db.rollback()
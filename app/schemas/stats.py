@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from pydantic import BaseModel
+
+
+class GradeCount(BaseModel):
+    grade: int
+    pending: int = 0
+    answered: int = 0
+
+
+class AnswerTimeStats(BaseModel):
+    count: int
+    average_seconds: float | None
+    p50_seconds: float | None
+    p90_seconds: float | None
+    p99_seconds: float | None
+
+
+class StatsOut(BaseModel):
+    total: int
+    pending: int
+    answered: int
+    by_grade: list[GradeCount]
+    time_to_answer: AnswerTimeStats
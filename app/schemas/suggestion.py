@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class SuggestionCreateIn(BaseModel):
@@ -21,6 +21,35 @@ class SuggestionAnswerIn(BaseModel):
     answer: str = Field(min_length=1, max_length=10_000)
 
 
+class BulkAnswerItem(BaseModel):
+    id: int
+    answer: str = Field(min_length=1, max_length=10_000)
+
+
+class SuggestionBulkAnswerIn(BaseModel):
+    """Either per-suggestion answers (``items``) or one ``answer`` shared by ``ids``."""
+
+    items: list[BulkAnswerItem] = Field(default_factory=list, max_length=200)
+    ids: list[int] = Field(default_factory=list, max_length=200)
+    answer: str | None = Field(default=None, min_length=1, max_length=10_000)
+
+    @model_validator(mode="after")
+    def _one_form(self):
+        if self.items and (self.ids or self.answer is not None):
+            raise ValueError("Send either items, or ids with a shared answer")
+        if not self.items and not (self.ids and self.answer is not None):
+            raise ValueError("Nothing to answer")
+        ids = [i.id for i in self.items] or self.ids
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate suggestion ids")
+        return self
+
+    def answers(self) -> dict[int, str]:
+        if self.items:
+            return {i.id: i.answer.strip() for i in self.items}
+        return {i: self.answer.strip() for i in self.ids}
+
+
 class SuggestionOut(BaseModel):
     id: int
     grade: int
@@ -34,3 +63,15 @@ class SuggestionOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class SuggestionPage(BaseModel):
+    items: list[SuggestionOut]
+    # Opaque keyset cursor for the next page; None on the last page.
+    next_cursor: str | None = None
+
+
+class SuggestionBulkAnswerOut(BaseModel):
+    items: list[SuggestionOut]
+    # Requested ids that do not exist (nothing was changed for them)
+    missing: list[int] = []
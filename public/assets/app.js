@@ -1,7 +1,7 @@
 // Shared frontend utilities (Vanilla JS)
 // - API base resolution
 // - student_key handling
-// - fetch wrapper
+// - fetch wrapper (with ETag revalidation for GETs)
 // - simple modal / toast
 
 (function () {
@@ -21,6 +21,9 @@
     return newKey;
   }
 
+  // GET url -> { etag, data }; revalidated with If-None-Match, 304 reuses data.
+  const etagCache = new Map();
+
   async function apiFetch(path, { method = 'GET', headers = {}, body } = {}) {
     const url = API_BASE + path;
     const finalHeaders = {
@@ -33,12 +36,19 @@
       finalHeaders['X-Student-Key'] = getStudentKey();
     }
 
+    const cached = method === 'GET' ? etagCache.get(url) : undefined;
+    if (cached) finalHeaders['If-None-Match'] = cached.etag;
+
     const res = await fetch(url, {
       method,
       headers: finalHeaders,
       body: body !== undefined ? JSON.stringify(body) : undefined,
     });
 
+    if (res.status === 304 && cached) {
+      return cached.data;
+    }
+
     const text = await res.text();
     let data = null;
     try {
@@ -55,6 +65,14 @@
       throw err;
     }
 
+    const etag = res.headers.get('ETag');
+    if (method === 'GET' && etag) {
+      etagCache.set(url, { etag, data });
+    } else if (method !== 'GET') {
+      // Writes may change any list; drop cached bodies so the next GET is fresh.
+      etagCache.clear();
+    }
+
     return data;
   }
 
@@ -0,0 +1,72 @@
+"""Move old answered suggestions to suggestions_archive.
+
+Usage:
+  python scripts/archive_suggestions.py                      # everything answered > ARCHIVE_AFTER_DAYS ago
+  python scripts/archive_suggestions.py --dry-run            # only count what would move
+  python scripts/archive_suggestions.py --older-than-days 180 --batch-size 200 --max-seconds 600
+
+Each batch is its own short transaction followed by a pause
+(ARCHIVE_BATCH_PAUSE_SECONDS), so the app keeps writing while this runs;
+still, schedule it outside school hours (e.g. nightly cron). --max-seconds /
+--max-batches stop early and leave the rest for the next run.
+
+This script uses the same DATABASE_URL as the app (from .env).
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.archive import MAX_ARCHIVE_BATCH_SIZE, archive_answered, archive_cutoff, count_archivable
+from app.core.config import settings
+from app.db.migrate import schema_is_current
+from app.db.session import SessionLocal, engine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.ARCHIVE_BATCH_SIZE,
+        help=f"rows per transaction (at most {MAX_ARCHIVE_BATCH_SIZE})",
+    )
+    parser.add_argument("--pause", type=float, default=settings.ARCHIVE_BATCH_PAUSE_SECONDS, help="seconds between batches")
+    parser.add_argument("--max-batches", type=int, help="stop after this many batches")
+    parser.add_argument("--max-seconds", type=float, help="stop starting new batches after this long")
+    parser.add_argument("--dry-run", action="store_true", help="count eligible suggestions and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.older_than_days < 1:
+        raise SystemExit("--older-than-days must be at least 1")
+    if not schema_is_current(engine):
+        raise SystemExit("Database schema is behind: run `python scripts/migrate.py` first")
+
+    db = SessionLocal()
+    try:
+        if args.dry_run:
+            print("Suggestions to archive:", count_archivable(db, archive_cutoff(args.older_than_days)))
+            return
+        moved = archive_answered(
+            db,
+            older_than_days=args.older_than_days,
+            batch_size=args.batch_size,
+            pause_seconds=args.pause,
+            max_batches=args.max_batches,
+            max_seconds=args.max_seconds,
+        )
+        print("Archived suggestions:", moved)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
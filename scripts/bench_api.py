@@ -0,0 +1,442 @@
+"""API load benchmark: realistic traffic mix, per-endpoint latency and throughput.
+
+Usage:
+  python scripts/bench_api.py                                   # temp SQLite, 10s, 32 clients
+  python scripts/bench_api.py --suggestions 20000 --duration 30 --concurrency 64
+  python scripts/bench_api.py --mix poll=80,submit=10,answer=10 --output bench.json
+  python scripts/bench_api.py --database-url postgresql://u:p@localhost/bench --reset
+
+What it does:
+1) creates (or, with --reset, recreates) the schema and seeds suggestions,
+   push subscriptions and one admin directly through SQLAlchemy
+2) starts a stub push service on localhost (answers 201) and points every
+   subscription at it, with a throwaway VAPID key, so answering exercises
+   the real outbox + delivery path without leaving the machine
+3) boots the app with uvicorn in a subprocess and drives it with async
+   clients for --warmup + --duration seconds
+4) prints one JSON document: config, git commit, and per operation the
+   request count, throughput, error count, status codes and p50/p95/p99
+
+Operations (weights via --mix):
+- poll:         GET /api/me/suggestions with the student's last ETag
+- submit:       POST /api/suggestions
+- admin_list:   GET /api/admin/suggestions (random grade/status filter, sometimes page 2)
+- admin_search: GET /api/admin/suggestions?q=...
+- answer:       PATCH /api/admin/suggestions/{id}/answer on a pending suggestion
+- stats:        GET /api/admin/stats
+
+--database-url must point at a scratch database.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, str(ROOT))
+
+DEFAULT_MIX = "poll=60,submit=10,admin_list=12,admin_search=8,answer=5,stats=5"
+ADMIN_USERNAME = "bench-admin"
+ADMIN_PASSWORD = "bench-password"
+WORDS = ["급식", "급식실", "체육관", "도서관", "에어컨", "와이파이", "화장실", "매점", "축제", "동아리", "교복", "시간표"]
+
+
+# ---------------------------------------------------------------------------
+# Stub push service
+# ---------------------------------------------------------------------------
+
+class _PushStub(BaseHTTPRequestHandler):
+    received = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with _PushStub.lock:
+            _PushStub.received += 1
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def _start_push_stub() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PushStub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _vapid_keys() -> tuple[str, str]:
+    import base64
+
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+    public = key.public_key().public_bytes(serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint)
+    return private_pem, base64.urlsafe_b64encode(public).decode().rstrip("=")
+
+
+# ---------------------------------------------------------------------------
+# Seeding
+# ---------------------------------------------------------------------------
+
+def _seed(args, push_base: str) -> dict:
+    """Create the schema and bulk-insert the dataset; returns what the clients need."""
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.orm import Session
+
+    from app.core.security import hash_password
+    from app.core.stats import rebuild_stats
+    from app.db.base import Base
+    from app.db.migrate import upgrade_schema
+    from app.db.session import engine
+    from app.models import Admin, PushSubscription, Suggestion
+    from app.models.push import endpoint_hash
+
+    if args.reset:
+        Base.metadata.drop_all(bind=engine)
+    upgrade_schema(engine)
+
+    rng = random.Random(args.seed)
+    students = [f"bench-student-{i:06d}" for i in range(args.students)]
+    now = datetime.now(timezone.utc)
+
+    with Session(engine) as db:
+        if db.execute(select(func.count(Suggestion.id))).scalar():
+            sys.exit("Database already has suggestions; use a scratch database or --reset")
+
+        rows = []
+        for i in range(args.suggestions):
+            created_at = now - timedelta(seconds=rng.uniform(0, 60 * 86400))
+            answered = rng.random() < args.answered_ratio
+            words = rng.sample(WORDS, 3)
+            rows.append({
+                "student_key": rng.choice(students),
+                "grade": rng.randint(1, 3),
+                "title": f"{words[0]} 관련 건의 {i}",
+                "content": f"{words[1]} 와 {words[2]} 개선을 요청합니다. " * 3,
+                "status": "answered" if answered else "pending",
+                "answer": "검토 후 반영하겠습니다." if answered else None,
+                "answered_at": created_at + timedelta(hours=rng.uniform(1, 96)) if answered else None,
+                "created_at": created_at,
+                "updated_at": created_at,
+            })
+        for start in range(0, len(rows), 5000):
+            db.execute(insert(Suggestion), rows[start : start + 5000])
+
+        subscribed = rng.sample(students, min(args.subscriptions, len(students)))
+        db.execute(
+            insert(PushSubscription),
+            [
+                {
+                    "student_key": key,
+                    "endpoint": f"{push_base}/push/{n}",
+                    "endpoint_hash": endpoint_hash(f"{push_base}/push/{n}"),
+                    "p256dh": "bench",
+                    "auth": "bench",
+                }
+                for n, key in enumerate(subscribed)
+            ],
+        )
+        admin = Admin(username=ADMIN_USERNAME, password_hash=hash_password(ADMIN_PASSWORD))
+        db.add(admin)
+        db.flush()
+        admin_endpoint = f"{push_base}/push/admin"
+        db.add(
+            PushSubscription(
+                admin_id=admin.id,
+                endpoint=admin_endpoint,
+                endpoint_hash=endpoint_hash(admin_endpoint),
+                p256dh="bench",
+                auth="bench",
+            )
+        )
+        rebuild_stats(db)
+        db.commit()
+
+        pending = list(db.execute(select(Suggestion.id).where(Suggestion.status == "pending")).scalars())
+    engine.dispose()
+    return {"students": students, "pending": pending}
+
+
+# ---------------------------------------------------------------------------
+# Load generation
+# ---------------------------------------------------------------------------
+
+def _parse_mix(raw: str) -> dict[str, float]:
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(OPERATIONS)
+    if unknown:
+        sys.exit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+class Traffic:
+    def __init__(self, client, rng: random.Random, data: dict, admin_headers: dict):
+        self.client = client
+        self.rng = rng
+        self.students = data["students"]
+        self.pending = data["pending"]
+        self.admin = admin_headers
+        self.etags: dict[str, str] = {}
+
+    async def poll(self):
+        key = self.rng.choice(self.students)
+        headers = {"X-Student-Key": key}
+        if key in self.etags:
+            headers["If-None-Match"] = self.etags[key]
+        r = await self.client.get("/api/me/suggestions", headers=headers)
+        if "etag" in r.headers:
+            self.etags[key] = r.headers["etag"]
+        return r
+
+    async def submit(self):
+        words = self.rng.sample(WORDS, 2)
+        r = await self.client.post(
+            "/api/suggestions",
+            headers={"X-Student-Key": self.rng.choice(self.students)},
+            json={"grade": self.rng.randint(1, 3), "title": f"{words[0]} 건의", "content": f"{words[1]} 개선 요청입니다."},
+        )
+        if r.status_code == 200:
+            self.pending.append(r.json()["id"])
+        return r
+
+    async def admin_list(self):
+        params = {"limit": 30}
+        if self.rng.random() < 0.5:
+            params["grade"] = self.rng.randint(1, 3)
+        if self.rng.random() < 0.5:
+            params["status"] = self.rng.choice(["pending", "answered"])
+        r = await self.client.get("/api/admin/suggestions", headers=self.admin, params=params)
+        if r.status_code == 200 and r.json()["next_cursor"] and self.rng.random() < 0.3:
+            params["cursor"] = r.json()["next_cursor"]
+            r = await self.client.get("/api/admin/suggestions", headers=self.admin, params=params)
+        return r
+
+    async def admin_search(self):
+        params = {"limit": 30, "q": self.rng.choice(WORDS)}
+        return await self.client.get("/api/admin/suggestions", headers=self.admin, params=params)
+
+    async def answer(self):
+        if not self.pending:
+            return await self.stats()
+        suggestion_id = self.pending.pop(self.rng.randrange(len(self.pending)))
+        return await self.client.patch(
+            f"/api/admin/suggestions/{suggestion_id}/answer", headers=self.admin, json={"answer": "반영하겠습니다."}
+        )
+
+    async def stats(self):
+        return await self.client.get("/api/admin/stats", headers=self.admin)
+
+
+OPERATIONS = ["poll", "submit", "admin_list", "admin_search", "answer", "stats"]
+
+
+async def _drive(base_url: str, args, data: dict) -> tuple[dict[str, list[float]], dict[str, dict[int, int]], float]:
+    import httpx
+
+    mix = _parse_mix(args.mix)
+    names, weights = list(mix), list(mix.values())
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    statuses: dict[str, dict[int, int]] = {name: {} for name in names}
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        login = await client.post("/api/admin/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+        login.raise_for_status()
+        admin_headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        measure_from = start + args.warmup
+        stop_at = measure_from + args.duration
+
+        async def worker(n: int):
+            traffic = Traffic(client, random.Random(args.seed + n), data, admin_headers)
+            while True:
+                name = traffic.rng.choices(names, weights)[0]
+                t0 = loop.time()
+                if t0 >= stop_at:
+                    return
+                try:
+                    status = (await getattr(traffic, name)()).status_code
+                except httpx.HTTPError:
+                    status = 0
+                t1 = loop.time()
+                if t0 >= measure_from:
+                    latencies[name].append(t1 - t0)
+                    statuses[name][status] = statuses[name].get(status, 0) + 1
+
+        await asyncio.gather(*(worker(n) for n in range(args.concurrency)))
+    return latencies, statuses, args.duration
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    # nearest-rank
+    index = max(0, min(len(sorted_values) - 1, int(round(p * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _summarize(samples: list[float], codes: dict[int, int], duration: float) -> dict:
+    values = sorted(samples)
+    errors = sum(count for code, count in codes.items() if code == 0 or code >= 400)
+    summary = {
+        "requests": len(values),
+        "throughput_rps": len(values) / duration,
+        "errors": errors,
+        "status_codes": {str(code): count for code, count in sorted(codes.items())},
+    }
+    if values:
+        summary.update(
+            mean_ms=statistics.fmean(values) * 1000,
+            p50_ms=_percentile(values, 0.50) * 1000,
+            p95_ms=_percentile(values, 0.95) * 1000,
+            p99_ms=_percentile(values, 0.99) * 1000,
+            max_ms=values[-1] * 1000,
+        )
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(env: dict[str, str], port: int, workers: int) -> subprocess.Popen:
+    import httpx
+
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"uvicorn exited with {proc.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/api/health", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    sys.exit("uvicorn did not become ready within 30s")
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    parser.add_argument("--suggestions", type=int, default=5000)
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--subscriptions", type=int, default=300, help="students with a push subscription")
+    parser.add_argument("--answered-ratio", type=float, default=0.5)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before measuring")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+    _parse_mix(args.mix)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        push_base = _start_push_stub()
+        vapid_private, vapid_public = _vapid_keys()
+        env = dict(os.environ)
+        env.update(
+            DATABASE_URL=args.database_url or f"sqlite:///{tmp}/bench.db",
+            JWT_SECRET_KEY=env.get("JWT_SECRET_KEY", "bench"),
+            VAPID_PRIVATE_KEY=vapid_private,
+            VAPID_PUBLIC_KEY=vapid_public,
+            AUTO_CREATE_TABLES="false",
+            LOGIN_MAX_FAILURES_PER_IP="1000000",
+            # every simulated student comes from 127.0.0.1
+            RATE_LIMIT_ENABLED="false",
+        )
+        os.environ.update(env)  # seeding below imports app.* with the same settings
+
+        data = _seed(args, push_base)
+        port = _free_port()
+        server = _start_server(env, port, args.workers)
+        try:
+            latencies, statuses, duration = asyncio.run(_drive(f"http://127.0.0.1:{port}", args, data))
+            time.sleep(1.0)  # let the last background outbox drains reach the stub
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+
+    operations = {name: _summarize(latencies[name], statuses[name], duration) for name in latencies}
+    all_latencies = [v for values in latencies.values() for v in values]
+    all_codes: dict[int, int] = {}
+    for codes in statuses.values():
+        for code, count in codes.items():
+            all_codes[code] = all_codes.get(code, 0) + count
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "database": args.database_url.split("://", 1)[0] if args.database_url else "sqlite (temp file)",
+        "config": {
+            "suggestions": args.suggestions,
+            "students": args.students,
+            "subscriptions": args.subscriptions,
+            "mix": _parse_mix(args.mix),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "workers": args.workers,
+            "seed": args.seed,
+        },
+        "total": _summarize(all_latencies, all_codes, duration),
+        "operations": operations,
+        "push_stub_received": _PushStub.received,
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
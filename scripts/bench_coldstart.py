@@ -0,0 +1,157 @@
+"""Cold-start benchmark: import time and time to first request.
+
+Usage:
+  python scripts/bench_coldstart.py                 # 5 fresh interpreters, JSON to stdout
+  python scripts/bench_coldstart.py --runs 10 --top 20
+
+Every run starts a new interpreter, the way a serverless cold start does:
+1) ``python -X importtime -c "import app.main"`` to attribute import cost to modules
+2) import + ASGI startup + ``GET /api/health`` driven directly through the ASGI
+   interface (no server, no extra dependencies)
+
+The database is a throwaway SQLite file migrated beforehand, so the startup
+schema check takes its fast path like it does in production. Output is a
+single JSON document so runs can be compared across commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+_FIRST_REQUEST = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+from app.main import app
+t_import = time.perf_counter()
+
+async def drive():
+    async def lifespan_receive():
+        if not sent["startup"]:
+            sent["startup"] = True
+            return {"type": "lifespan.startup"}
+        await asyncio.Event().wait()
+
+    async def lifespan_send(message):
+        if message["type"].startswith("lifespan.startup"):
+            started.set()
+
+    sent = {"startup": False}
+    started = asyncio.Event()
+    lifespan = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}}, lifespan_receive, lifespan_send))
+    await started.wait()
+    t_startup = time.perf_counter()
+
+    status = {}
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/api/health", "raw_path": b"/api/health", "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    t_request = time.perf_counter()
+    lifespan.cancel()
+    return t_startup, t_request, status.get("code")
+
+t_startup, t_request, code = asyncio.run(drive())
+print(json.dumps({
+    "import_s": t_import - t0,
+    "startup_s": t_startup - t_import,
+    "first_request_s": t_request - t_startup,
+    "total_s": t_request - t0,
+    "status": code,
+}))
+"""
+
+
+def _env(database_url: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = database_url
+    env.setdefault("JWT_SECRET_KEY", "bench")
+    env["PUSH_WORKER_ENABLED"] = "false"
+    return env
+
+
+def _importtime(env: dict[str, str]) -> dict[str, int]:
+    """Cumulative import time (microseconds) per module for one cold import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cum, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+            cumulative[name] = int(cum)
+        except ValueError:
+            continue  # header line
+    return cumulative
+
+
+def _first_request(env: dict[str, str]) -> dict:
+    proc = subprocess.run(
+        [sys.executable, "-c", _FIRST_REQUEST],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _summary(values: list[float]) -> dict[str, float]:
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "max": max(values),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = _env(f"sqlite:///{tmp}/bench.db")
+        subprocess.run([sys.executable, "scripts/migrate.py"], cwd=ROOT, env=env, capture_output=True, check=True)
+
+        # Warm the bytecode cache once so every measured run sees the same state.
+        subprocess.run([sys.executable, "-c", "import app.main"], cwd=ROOT, env=env, check=True)
+
+        imports = [_importtime(env) for _ in range(args.runs)]
+        first_requests = [_first_request(env) for _ in range(args.runs)]
+
+    modules = sorted(imports[0], key=lambda m: statistics.median(r.get(m, 0) for r in imports), reverse=True)
+    report = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "import_app_main_ms": _summary([r["app.main"] / 1000 for r in imports]),
+        "import_s": _summary([r["import_s"] for r in first_requests]),
+        "startup_s": _summary([r["startup_s"] for r in first_requests]),
+        "first_request_s": _summary([r["first_request_s"] for r in first_requests]),
+        "total_s": _summary([r["total_s"] for r in first_requests]),
+        "first_request_status": first_requests[0]["status"],
+        "slowest_imports_ms": {
+            m: statistics.median(r.get(m, 0) for r in imports) / 1000 for m in modules[: args.top]
+        },
+    }
+    json.dump(report, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Query-count regression check: every API endpoint has a pinned SQL statement budget.
+
+Usage:
+  python scripts/check_query_budget.py                                 # throwaway SQLite file
+  python scripts/check_query_budget.py --database-url postgresql://u:p@localhost/scratch
+  python scripts/check_query_budget.py -v                              # print every count
+
+Each endpoint in app/routers/ is called through TestClient inside
+``count_queries`` (app/db/querycount.py) and compared with its BUDGETS entry.
+Going over prints the statements the call ran; an API route without a
+BUDGETS entry is also a failure, so new endpoints get pinned when they are
+added. When a change legitimately needs another statement, raise the budget
+in the same commit and say why.
+
+Counts are for the warm path (admin identity cached, schema current) with
+push delivery disabled, so outbox rows are only queued.
+
+--database-url must point at a scratch database: tables are created and filled.
+Exit code 1 when a budget is exceeded or missing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# (method, route path) -> max statements per call
+BUDGETS = {
+    ("GET", "/api/health"): 0,
+    ("POST", "/api/suggestions"): 4,  # counter upsert, admin push (merge UPDATE + INSERT), INSERT RETURNING
+    ("GET", "/api/me/suggestions"): 2,  # ETag keys (If-None-Match only), list
+    ("GET", "/api/me/suggestions/wait"): 2,
+    ("GET", "/api/me/suggestions/stream"): 0,  # not measured: an open stream never finishes (SSE off here)
+    ("PATCH", "/api/me/suggestions/{suggestion_id}"): 3,  # load, guarded UPDATE, reload (server-side updated_at)
+    ("DELETE", "/api/me/suggestions/{suggestion_id}"): 3,
+    ("POST", "/api/admin/login"): 2,
+    ("GET", "/api/admin/me"): 1,  # identity cache hit, fresh last_login_at by primary key
+    ("GET", "/api/admin/db/pool"): 0,
+    ("GET", "/api/admin/stats"): 2,
+    ("GET", "/api/admin/suggestions"): 3,  # search backend detection (once), ETag keys (If-None-Match only), page
+    ("GET", "/api/admin/suggestions/export"): 1,  # one streamed SELECT, whatever the row count
+    ("PATCH", "/api/admin/suggestions/{suggestion_id}/answer"): 7,
+    ("PATCH", "/api/admin/suggestions/answers"): 9,  # grows with distinct grades/histogram buckets, not with ids
+    ("POST", "/api/push/subscribe"): 1,  # upsert on endpoint_hash
+    ("DELETE", "/api/push/unsubscribe"): 2,  # detach from devices shared with an admin, delete the rest
+    ("POST", "/api/push/admin/subscribe"): 1,
+    ("GET", "/api/metrics"): 0,
+}
+
+
+def _setup_env(database_url: str | None, tmp: str) -> None:
+    os.environ["DATABASE_URL"] = database_url or f"sqlite:///{tmp}/budget.db"
+    os.environ.setdefault("JWT_SECRET_KEY", "check-query-budget")
+    os.environ["PUSH_WORKER_ENABLED"] = "false"
+    # Stream opens a never-ending response; with SSE off the route answers at once.
+    os.environ["SSE_ENABLED"] = "false"
+    os.environ["VAPID_PUBLIC_KEY"] = ""
+    os.environ["VAPID_PRIVATE_KEY"] = ""
+    os.environ["BCRYPT_ROUNDS"] = "4"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", help="scratch database (default: temporary SQLite file)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every count")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup_env(args.database_url, tmp)
+
+        from fastapi.routing import APIRoute
+        from fastapi.testclient import TestClient
+
+        from app.core.security import hash_password
+        from app.db.migrate import upgrade_schema
+        from app.db.querycount import count_queries
+        from app.db.session import SessionLocal, engine
+        from app.main import app
+        from app.models.admin import Admin
+
+        upgrade_schema(engine)
+        db = SessionLocal()
+        db.add(Admin(username="budgetcheck", password_hash=hash_password("budgetcheck-pw")))
+        db.commit()
+        db.close()
+
+        failures = 0
+        seen: set[tuple[str, str]] = set()
+
+        with TestClient(app) as c:
+
+            def call(method: str, route: str, url: str | None = None, **kwargs):
+                nonlocal failures
+                seen.add((method, route))
+                with count_queries() as tally:
+                    r = c.request(method, url or route, **kwargs)
+                if r.status_code != 304:  # revalidation hit
+                    r.raise_for_status()
+                budget = BUDGETS.get((method, route))
+                if budget is None:
+                    return r
+                if tally.queries > budget:
+                    failures += 1
+                    print(f"OVER BUDGET {method} {route}: {tally.queries} > {budget}\n{tally.describe()}")
+                elif args.verbose:
+                    print(f"ok {tally.queries:3d} / {budget:3d}  {method} {route}")
+                return r
+
+            student = {"X-Student-Key": "budget-student-0001"}
+            other = {"X-Student-Key": "budget-student-0002"}
+            ids = []
+            for i in range(6):
+                r = call(
+                    "POST", "/api/suggestions", headers=student if i % 2 else other,
+                    json={"grade": i % 3 + 1, "title": f"급식 개선 요청 {i}", "content": f"급식실 메뉴 개선 요청 내용 {i}"},
+                )
+                ids.append(r.json()["id"])
+
+            login = call("POST", "/api/admin/login", json={"username": "budgetcheck", "password": "budgetcheck-pw"})
+            admin = {"Authorization": f"Bearer {login.json()['access_token']}"}
+            c.get("/api/admin/me", headers=admin)  # warm the admin identity cache
+            call("GET", "/api/admin/me", headers=admin)
+            call("GET", "/api/admin/db/pool", headers=admin)
+            call("GET", "/api/admin/stats", headers=admin)
+            call("GET", "/api/metrics", headers=admin)
+
+            sub = {"endpoint": "https://push.invalid/x", "p256dh": "p" * 20, "auth": "a" * 16}
+            call("POST", "/api/push/subscribe", headers=student, json=sub)
+            call("POST", "/api/push/admin/subscribe", headers=admin, json=sub)
+
+            route = "/api/admin/suggestions/{suggestion_id}/answer"
+            call("PATCH", route, f"/api/admin/suggestions/{ids[1]}/answer", headers=admin, json={"answer": "검토"})
+            call("PATCH", "/api/admin/suggestions/answers", headers=admin, json={"ids": ids[3:5], "answer": "일괄"})
+
+            call("GET", "/api/health")
+            mine = call("GET", "/api/me/suggestions", headers=student)
+            revalidate = {**student, "If-None-Match": mine.headers["etag"]}
+            call("GET", "/api/me/suggestions", headers=revalidate)
+            call("GET", "/api/me/suggestions/wait", headers=student, params={"timeout": 0.01})
+            c.get("/api/me/suggestions/stream", headers=student)  # 404 with SSE off
+            seen.add(("GET", "/api/me/suggestions/stream"))
+
+            route = "/api/me/suggestions/{suggestion_id}"
+            call("PATCH", route, f"/api/me/suggestions/{ids[5]}", headers=student, json={"title": "수정"})
+            call("DELETE", route, f"/api/me/suggestions/{ids[5]}", headers=student)
+
+            for params in [{}, {"grade": 2, "status": "pending"}, {"q": "급식"}, {"include_archive": True, "q": "급식"}]:
+                page = call("GET", "/api/admin/suggestions", headers=admin, params={**params, "limit": 2})
+                revalidate = {**admin, "If-None-Match": page.headers["etag"]}
+                call("GET", "/api/admin/suggestions", headers=revalidate, params={**params, "limit": 2})
+                cursor = page.json()["next_cursor"]
+                if cursor:
+                    call("GET", "/api/admin/suggestions", headers=admin, params={**params, "limit": 2, "cursor": cursor})
+
+            call("GET", "/api/admin/suggestions/export", headers=admin)
+            call("GET", "/api/admin/suggestions/export", headers=admin, params={"format": "ndjson", "include_archive": True})
+
+            call("DELETE", "/api/push/unsubscribe", headers=student, params={"endpoint": sub["endpoint"]})
+            call("DELETE", "/api/push/unsubscribe", headers=student)
+
+        api_routes = {
+            (method, route.path)
+            for route in app.routes
+            if isinstance(route, APIRoute) and route.path.startswith("/api")
+            for method in route.methods
+        }
+        for key in sorted(api_routes - set(BUDGETS)):
+            failures += 1
+            print(f"NO BUDGET for {key[0]} {key[1]}: add it to BUDGETS")
+        for key in sorted(api_routes - seen):
+            failures += 1
+            print(f"NOT EXERCISED: {key[0]} {key[1]}")
+
+        print(f"{len(api_routes)} endpoints, {failures} failure(s)")
+        engine.dispose()
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""Query-plan regression check: fail if any router query needs a full table scan.
+
+Usage:
+  python scripts/check_query_plans.py                                  # throwaway SQLite file
+  python scripts/check_query_plans.py --database-url postgresql://u:p@localhost/scratch
+  python scripts/check_query_plans.py -v                               # print every plan
+
+The script drives the real API through TestClient (student, admin, search,
+answer and push flows), records every SQL statement the routers and the push
+outbox issue, then runs EXPLAIN on each one with its original parameters:
+- SQLite: ``EXPLAIN QUERY PLAN``; a plain ``SCAN <table>`` is a full scan.
+- PostgreSQL: ``EXPLAIN`` with ``enable_seqscan = off``, so a ``Seq Scan``
+  means no index can serve the query at all (small test tables would
+  otherwise always be seq-scanned).
+
+Only tables defined on Base.metadata are checked. A few statements scan by
+design and are listed in ALLOWED_SCANS with the reason.
+
+Both paths are meant to pass with zero full scans; the PostgreSQL path needs
+a server with the pg_trgm extension available (see app/db/search.py).
+
+--database-url must point at an empty scratch database: tables are created and
+filled, so drop and recreate it between runs.
+Exit code 1 when a full scan is found.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# (regex, reason) — a full scan in a statement matching the regex (searched in the
+# statement with whitespace collapsed) is expected. Keep each one specific to the
+# statement it is meant for.
+ALLOWED_SCANS = [
+    (r"FROM schema_version", "one-row version table"),
+    (r"FROM suggestion_counts", "dashboard counters: at most grades x statuses rows"),
+    (r"FROM answer_time_buckets", "time-to-answer histogram: bounded number of buckets"),
+    (r"lower\(suggestions_archive\.title\) LIKE", "archive search (include_archive + q): no FTS table for the archive on SQLite"),
+]
+
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)$")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+
+def _setup_env(database_url: str | None, tmp: str) -> None:
+    os.environ["DATABASE_URL"] = database_url or f"sqlite:///{tmp}/plans.db"
+    os.environ.setdefault("JWT_SECRET_KEY", "check-query-plans")
+    os.environ["PUSH_WORKER_ENABLED"] = "false"
+    os.environ["SSE_ENABLED"] = "false"
+    # No VAPID keys: nothing is sent, outbox rows are only queued.
+    os.environ["VAPID_PUBLIC_KEY"] = ""
+    os.environ["VAPID_PRIVATE_KEY"] = ""
+    # Same SQL either way; the sync driver lets every statement be replayed below.
+    os.environ["DB_ASYNC"] = "false"
+    os.environ["BCRYPT_ROUNDS"] = "4"
+
+
+def _exercise_api() -> None:
+    """Run every router query at least once (and the push outbox queries)."""
+    from fastapi.testclient import TestClient
+
+    from sqlalchemy import update
+
+    from app.core import push
+    from app.core.archive import archive_answered, archive_cutoff, count_archivable
+    from app.core.security import hash_password
+    from app.db.session import SessionLocal, engine
+    from app.main import app
+    from app.models.admin import Admin
+    from app.models.suggestion import Suggestion
+
+    db = SessionLocal()
+    db.add(Admin(username="plancheck", password_hash=hash_password("plancheck-pw")))
+    db.commit()
+    db.close()
+
+    with TestClient(app) as c:
+        students = [{"X-Student-Key": f"plan-student-{i:04d}"} for i in range(6)]
+        ids = []
+        for i in range(30):
+            r = c.post(
+                "/api/suggestions",
+                headers=students[i % len(students)],
+                json={"grade": i % 3 + 1, "title": f"급식 개선 요청 {i}", "content": f"내용 {i} 급식실 메뉴"},
+            )
+            r.raise_for_status()
+            ids.append(r.json()["id"])
+
+        token = c.post("/api/admin/login", json={"username": "plancheck", "password": "plancheck-pw"}).json()
+        admin = {"Authorization": f"Bearer {token['access_token']}"}
+        c.get("/api/admin/me", headers=admin).raise_for_status()
+        c.get("/api/admin/stats", headers=admin).raise_for_status()
+
+        sub = {"endpoint": "https://push.invalid/x", "p256dh": "p" * 20, "auth": "a" * 16}
+        c.post("/api/push/subscribe", headers=students[0], json=sub).raise_for_status()
+        c.post("/api/push/admin/subscribe", headers=admin, json=sub).raise_for_status()
+
+        for suggestion_id in ids[:5]:
+            c.patch(
+                f"/api/admin/suggestions/{suggestion_id}/answer", headers=admin, json={"answer": "검토하겠습니다"}
+            ).raise_for_status()
+
+        c.patch(
+            "/api/admin/suggestions/answers", headers=admin, json={"ids": ids[20:25], "answer": "일괄 답변"}
+        ).raise_for_status()
+
+        s = students[0]
+        mine = c.get("/api/me/suggestions", headers=s)
+        mine.raise_for_status()
+        revalidated = c.get("/api/me/suggestions", headers={**s, "If-None-Match": mine.headers["etag"]})
+        assert revalidated.status_code == 304, revalidated.status_code
+        c.get("/api/me/suggestions", headers=s, params={"since_answered_at": "2000-01-01T00:00:00"}).raise_for_status()
+        c.get("/api/me/suggestions/wait", headers=s, params={"timeout": 0.01}).raise_for_status()
+        c.patch(f"/api/me/suggestions/{ids[6]}", headers=s, json={"title": "수정된 제목"}).raise_for_status()
+        c.delete(f"/api/me/suggestions/{ids[12]}", headers=s).raise_for_status()
+
+        # Archive the first answers (answered "long ago") so both tables have rows.
+        with engine.begin() as conn:
+            conn.execute(
+                update(Suggestion)
+                .where(Suggestion.id.in_(ids[:3]))
+                .values(answered_at=datetime.now(timezone.utc) - timedelta(days=400))
+            )
+        db = SessionLocal()
+        try:
+            count_archivable(db, archive_cutoff(365))
+            archive_answered(db, older_than_days=365, pause_seconds=0)
+        finally:
+            db.close()
+
+        for params in [
+            {},
+            {"grade": 2},
+            {"status": "pending"},
+            {"status": "answered", "grade": 1},
+            {"q": "급식실"},
+            {"include_archive": True},
+            {"include_archive": True, "grade": 1},
+            {"include_archive": True, "q": "급식실"},
+        ]:
+            page = c.get("/api/admin/suggestions", headers=admin, params={**params, "limit": 5})
+            page.raise_for_status()
+            revalidate = {**admin, "If-None-Match": page.headers["etag"]}
+            revalidated = c.get("/api/admin/suggestions", headers=revalidate, params={**params, "limit": 5})
+            assert revalidated.status_code == 304, revalidated.status_code
+            if page.json()["next_cursor"]:
+                c.get(
+                    "/api/admin/suggestions",
+                    headers=admin,
+                    params={**params, "limit": 5, "cursor": page.json()["next_cursor"]},
+                ).raise_for_status()
+
+        for params in [{}, {"grade": 2, "status": "answered"}, {"q": "급식실", "include_archive": True, "format": "ndjson"}]:
+            c.get("/api/admin/suggestions/export", headers=admin, params=params).raise_for_status()
+
+        c.delete("/api/push/unsubscribe", headers=s, params={"endpoint": sub["endpoint"]}).raise_for_status()
+        c.delete("/api/push/unsubscribe", headers=s).raise_for_status()
+
+    # Push delivery is disabled here; run the worker's claim/record steps directly.
+    db = SessionLocal()
+    try:
+        rows = push._claim_batch(db, 10)
+        push._record_results(db, rows, [push.PushResult(ok=True) for _ in rows])
+    finally:
+        db.close()
+
+
+def _explain(conn, dialect: str, statement: str, parameters) -> list[str]:
+    cursor = conn.cursor()
+    try:
+        if dialect == "sqlite":
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        cursor.execute(f"EXPLAIN {statement}", parameters)
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def _full_scans(dialect: str, plan: list[str], tables: set[str]) -> list[str]:
+    pattern = _SQLITE_SCAN if dialect == "sqlite" else _POSTGRES_SCAN
+    found = []
+    for line in plan:
+        m = pattern.search(line.strip())
+        if m and m.group(1) in tables:
+            found.append(m.group(1))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", help="empty scratch database (default: temporary SQLite file)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup_env(args.database_url, tmp)
+
+        from sqlalchemy import event
+
+        from app.db.base import Base
+        from app.db.migrate import upgrade_schema
+        from app.db.session import engine
+
+        dialect = engine.dialect.name
+        if dialect not in {"sqlite", "postgresql"}:
+            sys.exit(f"Plan checks support SQLite and PostgreSQL, not {dialect}")
+        upgrade_schema(engine)
+        tables = set(Base.metadata.tables)
+
+        captured: list[tuple[str, object]] = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def _capture(conn, cursor, statement, parameters, context, executemany):
+            verb = statement.lstrip().split(None, 1)[0].upper()
+            if not executemany and verb in {"SELECT", "UPDATE", "DELETE", "INSERT", "WITH"}:
+                captured.append((statement, parameters))
+
+        _exercise_api()
+        event.remove(engine, "before_cursor_execute", _capture)
+
+        unique: dict[str, object] = {}
+        for statement, parameters in captured:
+            unique.setdefault(statement, parameters)
+
+        failures = 0
+        raw = engine.raw_connection()
+        try:
+            if dialect == "postgresql":
+                cursor = raw.cursor()
+                cursor.execute("SET enable_seqscan = off")
+                cursor.close()
+            for statement, parameters in unique.items():
+                if statement.lstrip().upper().startswith("INSERT") and " SELECT " not in statement.upper():
+                    continue  # plain VALUES insert, nothing to scan
+                plan = _explain(raw, dialect, statement, parameters)
+                scans = _full_scans(dialect, plan, tables)
+                flat = " ".join(statement.split())
+                allowed = next((reason for pattern, reason in ALLOWED_SCANS if re.search(pattern, flat)), None)
+                if scans and not allowed:
+                    failures += 1
+                    print(f"FULL SCAN on {', '.join(scans)}:\n  {flat}")
+                    for line in plan:
+                        print(f"    {line}")
+                elif args.verbose:
+                    note = f"  (allowed: {allowed})" if scans else ""
+                    print(f"ok{note}:\n  {flat}")
+                    for line in plan:
+                        print(f"    {line}")
+        finally:
+            raw.rollback()
+            raw.close()
+
+        print(f"{len(unique)} distinct statements checked on {dialect}, {failures} full scan(s)")
+        engine.dispose()
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,11 @@
 
 Usage:
   python scripts/create_admin.py --username admin --password "your-password"
+  python scripts/create_admin.py --username admin --password "new-password" --reset-password
+
+--reset-password also revokes every token issued to the admin so far. Running
+app workers keep accepting the old tokens until their cached identity expires
+(ADMIN_CACHE_TTL_SECONDS, default 60); restart them to cut access immediately.
 
 This script uses the same DATABASE_URL as the app (from .env).
 """
@@ -17,23 +22,40 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.core.security import hash_password
-from app.db.base import Base
+from app.db.migrate import upgrade_schema
 from app.db.session import SessionLocal, engine
+from app.deps import revoke_admin_tokens
 from app.models.admin import Admin
 
 
 def main():
-    parser = argparse.ArgumentParser()
+    parser = argparse.ArgumentParser(
+        epilog="Running app workers accept revoked tokens for up to ADMIN_CACHE_TTL_SECONDS "
+        f"(currently {settings.ADMIN_CACHE_TTL_SECONDS:g}s) after --reset-password; "
+        "restart them to cut access immediately.",
+    )
     parser.add_argument("--username", required=True)
     parser.add_argument("--password", required=True)
+    parser.add_argument(
+        "--reset-password",
+        action="store_true",
+        help="update an existing admin's password and revoke their tokens",
+    )
     args = parser.parse_args()
 
-    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
 
     db: Session = SessionLocal()
     try:
         exists = db.query(Admin).filter(Admin.username == args.username).first()
+        if exists and args.reset_password:
+            exists.password_hash = hash_password(args.password)
+            revoke_admin_tokens(db, exists)
+            db.commit()
+            print("Password reset for admin:", args.username)
+            return
         if exists:
             raise SystemExit("Admin already exists")
         admin = Admin(username=args.username, password_hash=hash_password(args.password))
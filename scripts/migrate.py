@@ -0,0 +1,53 @@
+"""Create or upgrade the database schema.
+
+Usage:
+  python scripts/migrate.py           # migrate to the current schema version
+  python scripts/migrate.py --check   # exit 1 if the database is behind
+  python scripts/migrate.py --rebuild-stats   # recount dashboard statistics from suggestions
+
+Run this once per deploy; the app itself only checks the schema version at
+startup. This script uses the same DATABASE_URL as the app (from .env).
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy.orm import Session
+
+from app.core.stats import rebuild_stats
+from app.db.migrate import SCHEMA_VERSION, current_version, upgrade_schema
+from app.db.session import engine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--check", action="store_true", help="only report whether a migration is needed")
+    parser.add_argument("--rebuild-stats", action="store_true", help="recompute dashboard counters from suggestions")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    version = current_version(engine)
+    if args.check:
+        print(f"Schema version: {version} (expected {SCHEMA_VERSION})")
+        raise SystemExit(0 if version == SCHEMA_VERSION else 1)
+
+    upgrade_schema(engine)
+    print(f"Schema migrated: {version} -> {SCHEMA_VERSION}")
+
+    if args.rebuild_stats:
+        with Session(engine) as db:
+            rebuild_stats(db)
+            db.commit()
+        print("Dashboard statistics rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Drain the push outbox.
+
+Usage:
+  python scripts/push_worker.py            # run forever
+  python scripts/push_worker.py --once     # drain due rows and exit (cron)
+
+Use this where the in-process worker cannot run (e.g. Vercel, with
+PUSH_WORKER_ENABLED=false). This script uses the same DATABASE_URL as the app (from .env).
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.core.push import drain_outbox, push_enabled
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true", help="drain due rows once and exit")
+    parser.add_argument("--interval", type=float, default=settings.PUSH_WORKER_INTERVAL_SECONDS)
+    parser.add_argument("--batch-size", type=int, default=settings.PUSH_OUTBOX_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if not push_enabled():
+        raise SystemExit("VAPID keys are not configured")
+
+    while True:
+        processed = drain_outbox(batch_size=args.batch_size)
+        if processed:
+            print("Processed outbox rows:", processed)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()